@@ -0,0 +1,123 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from OCC.Core.AIS import AIS_Shape
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.Graphic3d import Graphic3d_MaterialAspect
+from OCC.Core.Quantity import Quantity_Color, Quantity_TOC_RGB
+from OCC.Core.TopAbs import TopAbs_FORWARD
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import TopoDS_Shape
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+from OCC.Display.OCCViewer import get_color_from_name
+
+from geometry_jobs import DEVIATION_ANGLE, display_deflection
+
+log = logging.getLogger("cad.display")
+
+
+class DisplayItem:
+    def __init__(self, shape, color=None, material=None, transparency=None):
+        self.shape = shape
+        self.color = color
+        self.material = material
+        self.transparency = transparency
+
+
+def as_item(item):
+    """Accept a shape, a DisplayItem, a (shape, color, ...) tuple or a dict."""
+    if isinstance(item, DisplayItem):
+        return item
+    if isinstance(item, TopoDS_Shape):
+        return DisplayItem(item)
+    if isinstance(item, dict):
+        return DisplayItem(**item)
+    return DisplayItem(*item)
+
+
+def as_color(color):
+    if isinstance(color, Quantity_Color):
+        return color
+    if isinstance(color, str):
+        return get_color_from_name(color)
+    r, g, b = color
+    return Quantity_Color(r, g, b, Quantity_TOC_RGB)
+
+
+def _mesh(shape):
+    # One shape per worker: BRepMesh's own parallelism would only oversubscribe
+    BRepMesh_IncrementalMesh(shape, display_deflection(shape), False, DEVIATION_ANGLE, False)
+    return shape
+
+
+def unique_shapes(shapes):
+    """Shapes with distinct TShapes: instances of one part are meshed once.
+
+    Two workers meshing the same TShape would write its triangulations
+    concurrently.
+    """
+    seen = TopTools_IndexedMapOfShape()
+    unique = []
+    for shape in shapes:
+        if seen.Add(shape.Located(TopLoc_Location()).Oriented(TopAbs_FORWARD)) > len(unique):
+            unique.append(shape)
+    return unique
+
+
+def make_ais(item):
+    ais = AIS_Shape(item.shape)
+    ais.Attributes().SetAutoTriangulation(False)
+    if item.material is not None:
+        material = item.material
+        if not isinstance(material, Graphic3d_MaterialAspect):
+            material = Graphic3d_MaterialAspect(material)
+        ais.SetMaterial(material)
+    if item.color is not None:
+        ais.SetColor(as_color(item.color))
+    if item.transparency:
+        ais.SetTransparency(item.transparency)
+    return ais
+
+
+def display_batch(display, items, workers=None, update=True, fit=False):
+    """Display many shapes with a single viewer update.
+
+    Shapes are meshed in parallel first, then all AIS objects are created
+    and displayed without redraw, and the viewer is updated once at the
+    end, after fitting the view to them when fit is set. Returns
+    (ais_objects, timings) where timings maps each phase to its duration
+    in seconds.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    items = [as_item(item) for item in items]
+    timings["prepare"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_mesh, unique_shapes(item.shape for item in items)))
+    timings["mesh"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ctx = display.Context
+    ais_objects = []
+    for item in items:
+        ais = make_ais(item)
+        ctx.Display(ais, False)
+        ais_objects.append(ais)
+    timings["display"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if fit:
+        display.FitAll()
+    if update or fit:
+        ctx.UpdateCurrentViewer()
+    timings["update"] = time.perf_counter() - t0
+    timings["total"] = sum(timings.values())
+    return ais_objects, timings
+
+
+def format_timings(timings, count):
+    phases = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings.items())
+    return f"displayed {count} shapes: {phases}"
@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+from perf_stats import summarize
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference", "assets", "models")
+MODELS = (
+    "11752.stp",
+    "Ventilator.stp",
+    "as1-oc-214.stp",
+    "Motor-c.brep",
+    "2CylinderEngine.glb",
+    "fan.stl",
+    "bunny.pcd",
+    "surf114.igs",
+)
+MESH_LEVELS = (0.004, 0.001, 0.00025)
+DEFAULT_BASELINE = "bench_baseline.json"
+# Regressions smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 2.0
+
+
+class Skip(Exception):
+    """A stage that does not apply to this kind of model."""
+
+
+def _read_xde(reader_class, path):
+    from OCC.Core.IFSelect import IFSelect_RetDone
+    reader = reader_class()
+    if reader.ReadFile(path) != IFSelect_RetDone:
+        raise IOError(f"could not read {path}")
+    return reader
+
+
+def _transfer(reader):
+    reader.TransferRoots()
+    return reader.OneShape()
+
+
+def _read_gltf(path):
+    from OCC.Core.Message import Message_ProgressRange
+    from OCC.Core.RWGltf import RWGltf_CafReader
+    from OCC.Core.TDocStd import TDocStd_Document
+    reader = RWGltf_CafReader()
+    reader.SetDocument(TDocStd_Document("benchmark"))
+    if not reader.Perform(path, Message_ProgressRange()):
+        raise IOError(f"could not read {path}")
+    return reader.SingleShape()
+
+
+def _read_pcd(path):
+    from pcd_io import colors, positions, read_pcd
+    _, cloud = read_pcd(path)
+    return positions(cloud), colors(cloud)
+
+
+class ModelBench:
+    """Stages of one model file: each is (setup, run) and only run is timed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.ext = os.path.splitext(path)[1].lower()
+        self._shape = None
+
+    def shape(self):
+        # Loaded once, outside of any timing, for the stages working on the shape
+        if self._shape is None:
+            if self.ext == ".pcd":
+                raise Skip("point cloud")
+            self._shape = self._load_shape()
+        return self._shape
+
+    def _load_shape(self):
+        if self.ext in (".stp", ".step", ".igs", ".iges"):
+            return _transfer(self._read())
+        if self.ext == ".glb":
+            return _read_gltf(self.path)
+        from model_io import load_shape
+        return load_shape(self.path)
+
+    def _read(self):
+        from OCC.Core.IGESControl import IGESControl_Reader
+        from OCC.Core.STEPControl import STEPControl_Reader
+        return _read_xde(STEPControl_Reader if self.ext in (".stp", ".step") else IGESControl_Reader, self.path)
+
+    def stages(self):
+        stages = {"load": (lambda: None, self._run_load)}
+        if self.ext in (".stp", ".step", ".igs", ".iges"):
+            stages["transfer"] = (self._read, _transfer)
+        for coefficient in MESH_LEVELS:
+            stages[f"mesh@{coefficient:g}"] = (self._unmeshed_copy, lambda shape, c=coefficient: self._run_mesh(shape, c))
+        stages["bbox"] = (self.shape, self._run_bbox)
+        stages["mass"] = (self.shape, self._run_mass)
+        stages["boolean"] = (self.shape, self._run_boolean)
+        stages["display"] = (self._display_input, self._run_display)
+        return stages
+
+    def info(self):
+        try:
+            from tracing import shape_size
+            return shape_size(self.shape())
+        except Skip:
+            return {"points": len(_read_pcd(self.path)[0])}
+
+    def _run_load(self, _):
+        if self.ext in (".stp", ".step", ".igs", ".iges"):
+            return self._read()
+        if self.ext == ".pcd":
+            return _read_pcd(self.path)
+        return self._load_shape()
+
+    def _unmeshed_copy(self):
+        from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Copy
+        if self.ext in (".stl", ".glb"):
+            raise Skip("already a mesh")
+        return BRepBuilderAPI_Copy(self.shape(), True, False).Shape()
+
+    def _run_mesh(self, shape, coefficient):
+        from geometry_jobs import DEVIATION_ANGLE, display_deflection
+        from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+        BRepMesh_IncrementalMesh(shape, display_deflection(shape, coefficient), False, DEVIATION_ANGLE, True)
+
+    def _run_bbox(self, shape):
+        from OCC.Core.Bnd import Bnd_Box
+        from OCC.Core.BRepBndLib import brepbndlib
+        bbox = Bnd_Box()
+        brepbndlib.Add(shape, bbox)
+        return bbox
+
+    def _run_mass(self, shape):
+        from OCC.Core.BRepGProp import brepgprop
+        from OCC.Core.GProp import GProp_GProps
+        props = GProp_GProps()
+        brepgprop.VolumeProperties(shape, props)
+        brepgprop.SurfaceProperties(shape, GProp_GProps())
+        return props.Mass()
+
+    def _run_boolean(self, shape):
+        # Cut away the lower half of the bounding box: touches most faces
+        from OCC.Core.BRepAlgoAPI import BRepAlgoAPI_Cut
+        from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+        from OCC.Core.gp import gp_Pnt
+        xmin, ymin, zmin, xmax, ymax, zmax = self._run_bbox(shape).Get()
+        box = BRepPrimAPI_MakeBox(gp_Pnt(xmin - 1, ymin - 1, zmin - 1), gp_Pnt(xmax + 1, ymax + 1, (zmin + zmax) / 2)).Shape()
+        cut = BRepAlgoAPI_Cut(shape, box)
+        if not cut.IsDone():
+            raise RuntimeError("boolean cut failed")
+        return cut.Shape()
+
+    def _display_input(self):
+        # A fresh copy per run: the time includes meshing, as for an opened model
+        if self.ext == ".pcd":
+            return _read_pcd(self.path)
+        try:
+            return self._unmeshed_copy()
+        except Skip:
+            return self.shape()
+
+    def _run_display(self, shape):
+        renderer = offscreen_renderer()
+        if self.ext == ".pcd":
+            from OCC.Core.AIS import AIS_PointCloud
+            from pcd_io import point_array
+            cloud = AIS_PointCloud()
+            cloud.SetPoints(point_array(*shape))
+            renderer.Context.Display(cloud, True)
+        else:
+            renderer.DisplayShape(shape, update=True)
+        renderer.FitAll()
+        renderer.View.Redraw()
+        renderer.EraseAll()
+
+
+_renderer = None
+
+
+def offscreen_renderer():
+    global _renderer
+    if _renderer is None:
+        from OCC.Display.OCCViewer import OffscreenRenderer
+        _renderer = OffscreenRenderer((1024, 768))
+    return _renderer
+
+
+def time_stage(setup, run, repeat, warmup):
+    samples = []
+    for i in range(warmup + repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    stats = summarize(samples)
+    stats["min_ms"] = min(samples) * 1000.0
+    return stats
+
+
+def run_benchmarks(models, stages=None, repeat=3, warmup=1, log=print):
+    results = {}
+    for name in models:
+        bench = ModelBench(name if os.path.exists(name) else os.path.join(MODELS_DIR, name))
+        entry = results[os.path.basename(name)] = {"stages": {}}
+        try:
+            entry["info"] = bench.info()
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+            log(f"{name}: {entry['error']}")
+            continue
+        for stage, (setup, run) in bench.stages().items():
+            if stages and not any(stage.startswith(s) for s in stages):
+                continue
+            try:
+                entry["stages"][stage] = stats = time_stage(setup, run, repeat, warmup)
+            except Skip as e:
+                entry["stages"][stage] = {"skipped": str(e)}
+                continue
+            except Exception as e:
+                entry["stages"][stage] = {"error": f"{type(e).__name__}: {e}"}
+                log(f"{name} {stage}: {entry['stages'][stage]['error']}")
+                continue
+            log(f"{name:<22}{stage:<16}p50 {stats['p50_ms']:9.1f} ms   min {stats['min_ms']:9.1f} ms")
+    return results
+
+
+def environment():
+    try:
+        from OCC import VERSION as occ_version
+    except ImportError:
+        occ_version = None
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "occ": occ_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """(model, stage, old ms, new ms, ratio) of every stage slower than baseline by more than threshold."""
+    regressions = []
+    for model, entry in results.items():
+        old_stages = baseline.get(model, {}).get("stages", {})
+        for stage, stats in entry["stages"].items():
+            old = old_stages.get(stage, {})
+            if "p50_ms" not in stats or "p50_ms" not in old or old["p50_ms"] <= 0:
+                continue
+            ratio = stats["p50_ms"] / old["p50_ms"]
+            if ratio > 1.0 + threshold and stats["p50_ms"] - old["p50_ms"] > NOISE_FLOOR_MS:
+                regressions.append((model, stage, old["p50_ms"], stats["p50_ms"], ratio))
+    return regressions
+
+
+def _positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{text} is not a positive integer")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loading, meshing, queries, booleans and display of the reference models.")
+    parser.add_argument("models", nargs="*", default=list(MODELS), help="model files (default: the bundled corpus)")
+    parser.add_argument("--stages", nargs="*", help="only stages starting with these names (load, transfer, mesh, ...)")
+    parser.add_argument("--repeat", type=_positive_int, default=3, help="timed runs per stage")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before the timed ones")
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", default=DEFAULT_BASELINE, help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown over the baseline p50 (0.10 = 10%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.models, args.stages, args.repeat, args.warmup)
+    report = {"environment": environment(), "repeat": args.repeat, "warmup": args.warmup, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    status = 0
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for model, stage, old, new, ratio in regressions:
+            print(f"REGRESSION {model} {stage}: {old:.1f} ms -> {new:.1f} ms (x{ratio:.2f})")
+        if regressions:
+            status = 1
+        else:
+            print(f"no regression over {args.threshold:.0%} against {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
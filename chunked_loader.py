@@ -0,0 +1,119 @@
+import heapq
+import itertools
+import math
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from OCC.Core.Bnd import Bnd_Box
+from OCC.Core.BRepBndLib import brepbndlib
+
+from batch_display import as_item, make_ais
+from model_io import iter_parts
+from stall_watchdog import operation
+
+
+def part_size(shape):
+    bbox = Bnd_Box()
+    brepbndlib.Add(shape, bbox)
+    if bbox.IsVoid():
+        return 0.0
+    xmin, ymin, zmin, xmax, ymax, zmax = bbox.Get()
+    return math.sqrt((xmax - xmin) ** 2 + (ymax - ymin) ** 2 + (zmax - zmin) ** 2)
+
+
+def sized_parts(progress, shapes):
+    """GeometryJobExecutor job: (size, shape) pairs, largest first."""
+    parts = []
+    for shape in shapes:
+        progress.check()
+        parts.append((part_size(shape), shape))
+    parts.sort(key=lambda p: -p[0])
+    return parts
+
+
+class ChunkedDisplayScheduler(QObject):
+    """Displays queued shapes a few at a time from a zero-interval QTimer.
+
+    AIS display has to happen on the GUI thread, so each tick displays
+    queued items until the frame budget is spent, updates the viewer once
+    and returns to the event loop. Input and resize events are handled
+    between ticks and the model shows up progressively, largest parts
+    first. Items must already be meshed (tessellation cache, job executor).
+    """
+
+    displayed = pyqtSignal(object, object, object)  # key, ais, shape
+    progressed = pyqtSignal(int, int)  # displayed, total
+    finished = pyqtSignal(float)  # seconds since the first item was queued
+
+    def __init__(self, display, budget_ms=8.0, parent=None):
+        super().__init__(parent)
+        self.display = display
+        self.budget = budget_ms / 1000.0
+        self._queue = []
+        self._seq = itertools.count()
+        self._done = 0
+        self._total = 0
+        self._started = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._tick)
+
+    @property
+    def pending(self):
+        return len(self._queue)
+
+    def enqueue(self, key, item, size=None):
+        """Queue one item; bigger size is displayed sooner."""
+        item = as_item(item)
+        if size is None:
+            size = part_size(item.shape)
+        heapq.heappush(self._queue, (-size, next(self._seq), key, item))
+        self._total += 1
+        if self._started is None:
+            self._started = time.perf_counter()
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def enqueue_many(self, keyed_items):
+        for key, item, size in keyed_items:
+            self.enqueue(key, item, size)
+
+    def cancel(self):
+        self._timer.stop()
+        self._queue.clear()
+        self._done = self._total = 0
+        self._started = None
+
+    def _tick(self):
+        with operation("display chunk"):
+            self._display_chunk()
+
+    def _display_chunk(self):
+        ctx = self.display.Context
+        deadline = time.perf_counter() + self.budget
+        shown = 0
+        # At least one item per tick so that a huge part cannot stall the queue
+        while self._queue and (shown == 0 or time.perf_counter() < deadline):
+            _, _, key, item = heapq.heappop(self._queue)
+            ais = make_ais(item)
+            ctx.Display(ais, False)
+            self.displayed.emit(key, ais, item.shape)
+            shown += 1
+        self._done += shown
+        ctx.UpdateCurrentViewer()
+        self.progressed.emit(self._done, self._total)
+        if not self._queue:
+            self._timer.stop()
+            elapsed = time.perf_counter() - self._started
+            self._done = self._total = 0
+            self._started = None
+            self.finished.emit(elapsed)
+
+
+def load_parts(progress, cache, path):
+    """GeometryJobExecutor job: open a model through the cache and split it into sized parts."""
+    progress.report(0.0, "loading")
+    shape, _ = cache.load(path)
+    progress.check()
+    return sized_parts(progress, iter_parts(shape))
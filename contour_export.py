@@ -0,0 +1,211 @@
+import argparse
+import csv
+import functools
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from slicer import iter_slices, load_source, section_polylines, slice_heights, z_range
+
+
+class Contour:
+    """A closed loop of one layer in the XY plane; outer loops are counter-clockwise."""
+
+    def __init__(self, points, outer):
+        self.points = points
+        self.outer = outer
+
+
+def signed_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def contains(points, x, y):
+    """Even-odd point in polygon test, vectorized over the polygon edges."""
+    x0, y0 = points[:, 0], points[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    straddles = (y0 > y) != (y1 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cross_x = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return bool(np.count_nonzero(straddles & (x < cross_x)) % 2)
+
+
+def classify(loops):
+    """Contours from closed (n, 2) loops: a loop inside an odd number of others is a hole.
+
+    Loops of a planar section do not cross, so testing one point of each
+    loop against the others gives its nesting depth. Outer loops are made
+    counter-clockwise and holes clockwise, as SVG and most slicers expect.
+    """
+    contours = []
+    for i, loop in enumerate(loops):
+        x, y = loop[0]
+        depth = sum(1 for j, other in enumerate(loops) if j != i and contains(other, x, y))
+        outer = depth % 2 == 0
+        if (signed_area(loop) > 0) != outer:
+            loop = loop[::-1]
+        contours.append(Contour(loop, outer))
+    return contours
+
+
+def layer_contours(section, z, deflection, tolerance):
+    """Worker side of the pipeline: a section shape to classified contours."""
+    loops = [points[:, :2] for points, closed in section_polylines(section, deflection, tolerance) if closed and len(points) >= 3]
+    return classify(loops)
+
+
+class SvgWriter:
+    """One SVG per layer, all sharing the same view box so that they overlay."""
+
+    def __init__(self, directory, bounds, pattern="layer_{:05d}.svg"):
+        self.directory = directory
+        self.pattern = pattern
+        xmin, ymin, xmax, ymax = bounds
+        self._view_box = f"{xmin:g} {-ymax:g} {xmax - xmin:g} {ymax - ymin:g}"
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, index, z, contours):
+        # SVG y points down: y is negated, which also flips the winding
+        path = " ".join(
+            "M " + " L ".join(f"{x:.4f},{-y:.4f}" for x, y in c.points) + " Z" for c in contours
+        )
+        with open(os.path.join(self.directory, self.pattern.format(index)), "w") as f:
+            f.write(
+                f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{self._view_box}">\n'
+                f"<!-- z = {z:.6f} -->\n"
+                f'<path d="{path}" fill="black" fill-rule="evenodd" stroke="none"/>\n'
+                "</svg>\n"
+            )
+
+    def close(self):
+        pass
+
+
+class CsvWriter:
+    """All layers in one CSV: layer, z, loop, outer, x, y per point."""
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(["layer", "z", "loop", "outer", "x", "y"])
+
+    def write(self, index, z, contours):
+        for loop, contour in enumerate(contours):
+            self._csv.writerows(
+                (index, f"{z:.6f}", loop, int(contour.outer), f"{x:.6f}", f"{y:.6f}") for x, y in contour.points
+            )
+
+    def close(self):
+        self._file.close()
+
+
+class BinaryWriter:
+    """Compact contour file, little endian.
+
+    Header b"CNTR", uint32 version. Then per layer: uint32 layer index,
+    float64 z, uint32 loop count, and per loop: uint8 outer flag, uint32
+    point count and the points as float32 x, y pairs.
+    """
+
+    MAGIC = b"CNTR"
+    VERSION = 1
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._file.write(self.MAGIC + struct.pack("<I", self.VERSION))
+
+    def write(self, index, z, contours):
+        self._file.write(struct.pack("<IdI", index, z, len(contours)))
+        for contour in contours:
+            self._file.write(struct.pack("<BI", contour.outer, len(contour.points)))
+            self._file.write(np.ascontiguousarray(contour.points, dtype="<f4").tobytes())
+
+    def close(self):
+        self._file.close()
+
+
+def read_binary(path):
+    """Yield (layer, z, contours) from a BinaryWriter file."""
+    with open(path, "rb") as f:
+        if f.read(4) != BinaryWriter.MAGIC:
+            raise ValueError(f"{path} is not a contour file")
+        (version,) = struct.unpack("<I", f.read(4))
+        if version != BinaryWriter.VERSION:
+            raise ValueError(f"unsupported contour file version {version}")
+        while True:
+            header = f.read(16)
+            if not header:
+                return
+            index, z, count = struct.unpack("<IdI", header)
+            contours = []
+            for _ in range(count):
+                outer, n = struct.unpack("<BI", f.read(5))
+                points = np.frombuffer(f.read(8 * n), dtype="<f4").reshape(n, 2)
+                contours.append(Contour(points, bool(outer)))
+            yield index, z, contours
+
+
+def export_contours(source, count, writers, processes=None, deflection=None):
+    """Slice source into count layers and hand each layer's contours to the writers.
+
+    Sections are computed, discretized and classified in the worker
+    processes; layers are written as they complete, in any order, so only
+    the layers in flight are ever held in memory. Returns layer and loop counts.
+    """
+    zmin, zmax = z_range(load_source(source))
+    size = zmax - zmin
+    deflection = deflection or max(size, 1e-9) * 1e-4
+    process = functools.partial(layer_contours, deflection=deflection, tolerance=deflection * 0.1)
+    layers = loops = 0
+    try:
+        for index, z, contours, _ in iter_slices(source, slice_heights(zmin, zmax, count), processes, process):
+            contours = contours or []
+            for writer in writers:
+                writer.write(index, z, contours)
+            layers += 1
+            loops += len(contours)
+    finally:
+        for writer in writers:
+            writer.close()
+    return layers, loops
+
+
+def xy_bounds(shape):
+    from OCC.Core.Bnd import Bnd_Box
+    from OCC.Core.BRepBndLib import brepbndlib
+    bbox = Bnd_Box()
+    brepbndlib.Add(shape, bbox)
+    xmin, ymin, _, xmax, ymax, _ = bbox.Get()
+    return xmin, ymin, xmax, ymax
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slice a model and export the layer contours.")
+    parser.add_argument("model")
+    parser.add_argument("output", help="output directory")
+    parser.add_argument("--slices", type=int, default=500)
+    parser.add_argument("--formats", nargs="+", choices=("svg", "csv", "bin"), default=["svg", "bin"])
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--deflection", type=float, help="chordal deflection of the contour points")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    writers = []
+    if "svg" in args.formats:
+        writers.append(SvgWriter(os.path.join(args.output, "svg"), xy_bounds(load_source(args.model))))
+    if "csv" in args.formats:
+        writers.append(CsvWriter(os.path.join(args.output, "contours.csv")))
+    if "bin" in args.formats:
+        writers.append(BinaryWriter(os.path.join(args.output, "contours.bin")))
+    start = time.perf_counter()
+    layers, loops = export_contours(args.model, args.slices, writers, args.processes, args.deflection)
+    print(f"{layers} layers, {loops} loops written to {args.output} in {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
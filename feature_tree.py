@@ -0,0 +1,203 @@
+import itertools
+
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox, BRepPrimAPI_MakePrism
+from OCC.Core.Geom import Geom_Plane
+from OCC.Core.TopAbs import TopAbs_FACE
+from OCC.Core.TopExp import topexp
+from OCC.Core.TopoDS import topods
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+from OCC.Core.gp import gp_Vec
+
+from geometry_jobs import mesh_shape
+from tracing import span
+
+
+def face_map(shape):
+    faces = TopTools_IndexedMapOfShape()
+    topexp.MapShapes(shape, TopAbs_FACE, faces)
+    return faces
+
+
+def face_index(shape, face):
+    """0-based index of face in shape, or -1 if it does not belong to it."""
+    return face_map(shape).FindIndex(face) - 1
+
+
+def face_normal(face):
+    surf = BRep_Tool.Surface(face)
+    plane = Geom_Plane.DownCast(surf)
+    if plane is None:
+        raise ValueError("Selected face is not planar and cannot be extruded.")
+    direction = plane.Axis().Direction()
+    return gp_Vec(direction.X(), direction.Y(), direction.Z())
+
+
+class Feature:
+    """A node of the feature tree: named parameters plus the features it reads."""
+
+    kind = "feature"
+
+    def __init__(self, inputs=(), **params):
+        self.inputs = tuple(inputs)
+        self.params = params
+
+    def compute(self, *input_shapes):
+        raise NotImplementedError
+
+    def label(self):
+        args = ", ".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.kind}({args})"
+
+
+class BoxFeature(Feature):
+    kind = "box"
+
+    def __init__(self, dx, dy, dz):
+        super().__init__(dx=dx, dy=dy, dz=dz)
+
+    def compute(self):
+        p = self.params
+        return BRepPrimAPI_MakeBox(p["dx"], p["dy"], p["dz"]).Shape()
+
+
+class FaceRef(Feature):
+    """Picks a face of another feature's shape by its index in the face map."""
+
+    kind = "face"
+
+    def __init__(self, source, index):
+        super().__init__((source,), index=index)
+
+    def compute(self, shape):
+        faces = face_map(shape)
+        index = self.params["index"]
+        if not 0 <= index < faces.Size():
+            raise IndexError(f"face {index} does not exist on the parent shape")
+        return topods.Face(faces.FindKey(index + 1))
+
+
+class ExtrudeFeature(Feature):
+    kind = "extrude"
+
+    def __init__(self, face, distance):
+        super().__init__((face,), distance=distance)
+
+    def compute(self, face):
+        vec = face_normal(face).Scaled(self.params["distance"])
+        return BRepPrimAPI_MakePrism(face, vec).Shape()
+
+
+class FeatureTree:
+    """Dependency graph of features with memoized shapes.
+
+    Changing a parameter invalidates the feature and everything downstream
+    of it; recompute() then rebuilds only those, reusing the cached shapes
+    of the untouched features.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.features = {}
+        self._dependents = {}
+        self._cache = {}
+        self.tip = None
+
+    def add(self, feature):
+        for input_id in feature.inputs:
+            if input_id not in self.features:
+                raise KeyError(f"unknown input feature {input_id}")
+        feature_id = next(self._ids)
+        self.features[feature_id] = feature
+        self._dependents[feature_id] = []
+        for input_id in feature.inputs:
+            self._dependents[input_id].append(feature_id)
+        return feature_id
+
+    def remove(self, feature_id):
+        """Drop a feature together with everything built on it."""
+        doomed = self.downstream(feature_id)
+        for fid in doomed:
+            for input_id in self.features[fid].inputs:
+                if input_id not in doomed:
+                    self._dependents[input_id].remove(fid)
+        for fid in doomed:
+            del self.features[fid]
+            del self._dependents[fid]
+            self._cache.pop(fid, None)
+        if self.tip in doomed:
+            self.tip = None
+
+    def set_tip(self, feature_id):
+        self.tip = feature_id
+
+    def set_param(self, feature_id, name, value):
+        """Change a parameter and return its previous value."""
+        feature = self.features[feature_id]
+        old = feature.params[name]
+        if old != value:
+            feature.params[name] = value
+            self.invalidate(feature_id)
+        return old
+
+    def invalidate(self, feature_id):
+        stack = [feature_id]
+        while stack:
+            current = stack.pop()
+            if self._cache.pop(current, None) is not None:
+                stack.extend(self._dependents[current])
+
+    def downstream(self, feature_id):
+        seen, stack = set(), [feature_id]
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self._dependents[current])
+        return seen
+
+    def is_dirty(self, feature_id):
+        return feature_id not in self._cache
+
+    def of_kind(self, *kinds):
+        return [fid for fid, f in self.features.items() if f.kind in kinds]
+
+    def shape(self, feature_id, check=None, rebuilt=None):
+        """Return the shape of a feature, computing stale inputs first."""
+        order = []
+        self._stale_order(feature_id, set(), order)
+        for fid in order:
+            if check is not None:
+                check()
+            feature = self.features[fid]
+            inputs = [self._cache[i] for i in feature.inputs]
+            with span(f"feature.{feature.kind}", id=fid):
+                self._cache[fid] = feature.compute(*inputs)
+            if rebuilt is not None:
+                rebuilt.append(fid)
+        return self._cache[feature_id]
+
+    def recompute(self, check=None):
+        """Bring the tip up to date and return (shape, ids of rebuilt features)."""
+        rebuilt = []
+        shape = self.shape(self.tip, check, rebuilt)
+        return shape, rebuilt
+
+    def _stale_order(self, feature_id, visited, order):
+        # Post-order walk limited to the features missing from the cache.
+        if feature_id in visited or feature_id in self._cache:
+            return
+        visited.add(feature_id)
+        for input_id in self.features[feature_id].inputs:
+            self._stale_order(input_id, visited, order)
+        order.append(feature_id)
+
+
+def recompute_job(progress, tree):
+    """GeometryJobExecutor job: rebuild the tip and mesh it for display."""
+    progress.report(0.0, "rebuilding")
+    shape, rebuilt = tree.recompute(check=progress.check)
+    # Faces a local feature left untouched still carry their triangulation,
+    # BRepMesh skips them and only meshes the new ones.
+    mesh_shape(progress, shape)
+    return shape, rebuilt
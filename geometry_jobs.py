@@ -0,0 +1,216 @@
+import itertools
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from OCC.Core.Bnd import Bnd_Box
+from OCC.Core.BRepBndLib import brepbndlib
+from OCC.Core.BRepGProp import brepgprop
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakePrism
+from OCC.Core.GProp import GProp_GProps
+from OCC.Core.IMeshTools import IMeshTools_Parameters
+from OCC.Core.Message import Message_ProgressIndicator, Message_ProgressRange
+
+# Same defaults as Prs3d_Drawer, so that a shape meshed here is reused as is
+# by the AIS presentation instead of being tessellated again on the GUI thread.
+DEVIATION_COEFFICIENT = 0.001
+DEVIATION_ANGLE = math.radians(20.0)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when the user asked to stop it."""
+
+
+class _KernelIndicator(Message_ProgressIndicator):
+    """Forwards OCCT progress to a JobProgress and answers UserBreak."""
+
+    def __init__(self, progress):
+        super().__init__()
+        self._progress = progress
+
+    def UserBreak(self):
+        return self._progress.cancelled
+
+    def Show(self, scope, is_force):
+        self._progress.report(self.GetPosition())
+
+
+class JobProgress:
+    """Handle given to a running job to report progress and poll for cancellation."""
+
+    def __init__(self, executor, job_id):
+        self._executor = executor
+        self._job_id = job_id
+        self._cancel_event = threading.Event()
+        self._indicator = None
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def report(self, fraction, stage=""):
+        self._executor.progress.emit(self._job_id, float(fraction), stage)
+
+    def range(self):
+        # Kernel algorithms poll UserBreak() through this range, so a long
+        # BRepMesh or boolean stops as soon as the user cancels.
+        try:
+            if self._indicator is None:
+                self._indicator = _KernelIndicator(self)
+            return self._indicator.Start()
+        except (TypeError, RuntimeError, AttributeError):
+            # Builds without director support for Message_ProgressIndicator:
+            # fall back to a null range and cancel between stages only.
+            return Message_ProgressRange()
+
+
+class NullProgress:
+    """Stands in for JobProgress when a job function is called directly."""
+
+    cancelled = False
+
+    def check(self):
+        pass
+
+    def report(self, fraction, stage=""):
+        pass
+
+    def range(self):
+        return Message_ProgressRange()
+
+
+class GeometryJobExecutor(QObject):
+    """Runs kernel work on a thread pool and hands results back through Qt signals.
+
+    Signals are emitted from the worker threads; Qt queues them to the
+    receiver's thread, so connected slots run on the GUI thread and may
+    touch the viewer.
+    """
+
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+    progress = pyqtSignal(int, float, str)
+
+    def __init__(self, max_workers=None, parent=None):
+        super().__init__(parent)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geometry-job")
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(progress, *args, **kwargs) and return its job id."""
+        job_id = next(self._ids)
+        progress = JobProgress(self, job_id)
+        future = self._pool.submit(self._run, job_id, progress, fn, args, kwargs)
+        with self._lock:
+            self._jobs[job_id] = (future, progress)
+        return job_id
+
+    def future(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job[0] if job else None
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return
+        future, progress = job
+        progress.cancel()
+        if future.cancel():
+            # Never started: nobody else will report it.
+            self._forget(job_id)
+            self.cancelled.emit(job_id)
+
+    def cancel_all(self):
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def shutdown(self, wait=False):
+        self.cancel_all()
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job_id, progress, fn, args, kwargs):
+        try:
+            progress.check()
+            result = fn(progress, *args, **kwargs)
+            progress.check()
+        except JobCancelled:
+            self.cancelled.emit(job_id)
+        except Exception as e:
+            if progress.cancelled:
+                self.cancelled.emit(job_id)
+            else:
+                self.failed.emit(job_id, str(e))
+        else:
+            self.finished.emit(job_id, result)
+            return result
+        finally:
+            self._forget(job_id)
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+def display_deflection(shape, coefficient=DEVIATION_COEFFICIENT):
+    # Mirrors Prs3d::GetDeflection for a relative deviation coefficient.
+    bbox = Bnd_Box()
+    brepbndlib.Add(shape, bbox)
+    if bbox.IsVoid():
+        return coefficient
+    xmin, ymin, zmin, xmax, ymax, zmax = bbox.Get()
+    return max(xmax - xmin, ymax - ymin, zmax - zmin) * coefficient * 4.0
+
+
+def mesh_shape(progress, shape, deflection=None, angle=DEVIATION_ANGLE):
+    """Tessellate shape in place with the deflection the viewer would use."""
+    params = IMeshTools_Parameters()
+    params.Deflection = deflection if deflection is not None else display_deflection(shape)
+    params.Angle = angle
+    params.InParallel = True
+    progress.report(0.0, "meshing")
+    BRepMesh_IncrementalMesh(shape, params, progress.range())
+    progress.check()
+    progress.report(1.0, "meshing")
+    return shape
+
+
+def extrude_face(progress, face, vector, mesh=True):
+    progress.report(0.0, "extruding")
+    shape = BRepPrimAPI_MakePrism(face, vector).Shape()
+    progress.check()
+    if mesh:
+        mesh_shape(progress, shape)
+    return shape
+
+
+def shape_properties(progress, shape):
+    progress.report(0.0, "properties")
+    volume = GProp_GProps()
+    brepgprop.VolumeProperties(shape, volume)
+    progress.check()
+    surface = GProp_GProps()
+    brepgprop.SurfaceProperties(shape, surface)
+    center = volume.CentreOfMass()
+    progress.report(1.0, "properties")
+    return {
+        "volume": volume.Mass(),
+        "area": surface.Mass(),
+        "center": (center.X(), center.Y(), center.Z()),
+    }
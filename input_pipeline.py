@@ -0,0 +1,140 @@
+import time
+from collections import deque
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QImage, QMouseEvent, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+import OCC.Display.qtDisplay as qtDisplay
+
+from perf_stats import FrameClock, summarize
+
+
+class LatencyMeter:
+    """Rolling window of input-to-photon latencies."""
+
+    def __init__(self, size=1024):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def stats(self):
+        return summarize(self.samples)
+
+    def reset(self):
+        self.samples.clear()
+
+
+def copy_mouse_event(evt):
+    # Qt reuses the event object once the handler returns
+    return QMouseEvent(evt.type(), evt.localPos(), evt.windowPos(), evt.screenPos(),
+                       evt.button(), evt.buttons(), evt.modifiers())
+
+
+class CoalescingViewer(qtDisplay.qtViewer3d):
+    """qtViewer3d that handles at most one mouse move per event-loop pass.
+
+    Moves are queued and only the latest is processed once the pending
+    events have been drained, so a high-rate mouse no longer stacks up
+    rotations. Hover moves, which run OCCT dynamic highlighting (MoveTo),
+    are further limited to one every PRESELECT_INTERVAL seconds. The time
+    from the oldest coalesced move to the end of the redraw it triggered
+    is recorded in self.latency.
+    """
+
+    PRESELECT_INTERVAL = 0.033
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_move = None
+        self._pending_since = None
+        self._last_preselect = 0.0
+        self.coalesced = 0
+        self.latency = LatencyMeter()
+        self.frames = FrameClock()
+        self._preselect_timer = QTimer(self)
+        self._preselect_timer.setSingleShot(True)
+        self._preselect_timer.timeout.connect(self._flush_move)
+        self._resize_deferred = False
+        self._resize_pending = False
+
+    def mouseMoveEvent(self, evt):
+        if self._pending_move is None:
+            self._pending_since = time.perf_counter()
+            QTimer.singleShot(0, self._flush_move)
+        else:
+            self.coalesced += 1
+        self._pending_move = copy_mouse_event(evt)
+
+    def mousePressEvent(self, evt):
+        self._flush_move(force=True)
+        super().mousePressEvent(evt)
+
+    def mouseReleaseEvent(self, evt):
+        self._flush_move(force=True)
+        super().mouseReleaseEvent(evt)
+
+    def _flush_move(self, force=False):
+        evt = self._pending_move
+        if evt is None:
+            return
+        if not evt.buttons() and not force:
+            now = time.perf_counter()
+            wait = self.PRESELECT_INTERVAL - (now - self._last_preselect)
+            if wait > 0:
+                if not self._preselect_timer.isActive():
+                    self._preselect_timer.start(int(wait * 1000) + 1)
+                return
+            self._last_preselect = now
+        self._pending_move = None
+        start = time.perf_counter()
+        super().mouseMoveEvent(evt)
+        end = time.perf_counter()
+        self.frames.add(end - start)
+        self.latency.add(end - self._pending_since)
+
+    def input_stats(self):
+        stats = self.latency.stats()
+        stats["coalesced"] = self.coalesced
+        return stats
+
+    def set_resize_deferred(self, deferred):
+        """While deferred, size changes do not reach the V3d_View.
+
+        Call flush_resize() (or set_resize_deferred(False)) to apply the
+        last size with a single MustBeResized and redraw.
+        """
+        self._resize_deferred = deferred
+        if not deferred:
+            self.flush_resize()
+
+    def flush_resize(self):
+        if self._resize_pending:
+            self._resize_pending = False
+            self._display.View.MustBeResized()
+            self._display.Repaint()
+
+    def resizeEvent(self, event):
+        if self._resize_deferred:
+            self._resize_pending = True
+            return
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self._resize_deferred:
+            return
+        start = time.perf_counter()
+        super().paintEvent(event)
+        self.frames.add(time.perf_counter() - start)
+
+    def snapshot(self):
+        """Last rendered frame as a QPixmap."""
+        w, h = self.width(), self.height()
+        try:
+            data = self._display.GetImageData(w, h)
+            # OCCT dumps RGB rows bottom-up
+            return QPixmap.fromImage(QImage(data, w, h, 3 * w, QImage.Format_RGB888).mirrored())
+        except Exception:
+            screen = self.screen() or QApplication.primaryScreen()
+            return screen.grabWindow(int(self.winId()))
@@ -0,0 +1,90 @@
+from PyQt5.QtCore import QEvent, QObject, Qt, QTimer
+from PyQt5.QtWidgets import QLabel
+
+MODES = ("off", "scale", "letterbox")
+
+
+class ResizePreview(QLabel):
+    """Stand-in for the 3D canvas showing its last frame during a resize."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Native so that it can stack above the native OCCT window
+        self.setAttribute(Qt.WA_NativeWindow)
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet("background-color: #15171c;")
+        self._frame = None
+        self.mode = "letterbox"
+        self.hide()
+
+    def set_frame(self, pixmap):
+        self._frame = pixmap
+        self._rescale()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._rescale()
+
+    def _rescale(self):
+        if self._frame is None or self._frame.isNull():
+            return
+        aspect = Qt.KeepAspectRatio if self.mode == "letterbox" else Qt.IgnoreAspectRatio
+        self.setPixmap(self._frame.scaled(self.size(), aspect, Qt.FastTransformation))
+
+
+class LiveResize(QObject):
+    """Defers OCCT view resizes while a window border is being dragged.
+
+    During the drag the canvas keeps its framebuffers and a scaled or
+    letterboxed copy of its last frame is shown instead. The view is
+    resized and redrawn once, when the drag ends or after idle_ms without
+    movement.
+    """
+
+    def __init__(self, window, canvas, mode="letterbox", idle_ms=150, parent=None):
+        super().__init__(parent or window)
+        if mode not in MODES:
+            raise ValueError(f"live resize mode must be one of {MODES}")
+        self.window = window
+        self.canvas = canvas
+        self.mode = mode
+        self.preview = ResizePreview(window)
+        self.preview.mode = mode
+        self._active = False
+        self._idle = QTimer(self)
+        self._idle.setSingleShot(True)
+        self._idle.setInterval(idle_ms)
+        self._idle.timeout.connect(self.settle)
+        canvas.installEventFilter(self)
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def moved(self):
+        """Call after each geometry change of the drag."""
+        if not self.enabled:
+            return
+        if not self._active:
+            self._active = True
+            self.preview.set_frame(self.canvas.snapshot())
+            self.canvas.set_resize_deferred(True)
+            self.preview.show()
+            self.preview.raise_()
+        self.preview.setGeometry(self.canvas.geometry())
+        self._idle.start()
+
+    def eventFilter(self, obj, event):
+        # The layout moves the canvas after setGeometry, follow it
+        if self._active and obj is self.canvas and event.type() == QEvent.Resize:
+            self.preview.setGeometry(self.canvas.geometry())
+        return False
+
+    def settle(self):
+        """Apply the pending resize: one MustBeResized and one redraw."""
+        self._idle.stop()
+        if not self._active:
+            return
+        self._active = False
+        self.preview.hide()
+        self.canvas.set_resize_deferred(False)
@@ -0,0 +1,105 @@
+from OCC.Core.BRepFeat import BRepFeat_MakePrism
+from OCC.Core.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+from OCC.Core.TopExp import topexp
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape, TopTools_ListIteratorOfListOfShape
+from OCC.Core.gp import gp_Dir
+
+from feature_tree import Feature, face_normal
+
+
+def iter_list_of_shape(list_of_shape):
+    it = TopTools_ListIteratorOfListOfShape(list_of_shape)
+    while it.More():
+        yield it.Value()
+        it.Next()
+
+
+def outward_normal(face):
+    normal = face_normal(face)
+    if face.Orientation() == TopAbs_REVERSED:
+        normal.Reverse()
+    return normal
+
+
+class FaceHistory:
+    """What a local operation did to the faces of the base solid.
+
+    kept      faces of the base found unchanged in the result
+    modified  (old face, [new faces]) pairs
+    deleted   faces of the base that are gone
+    changed   faces of the result that did not exist before; only these
+              need to be tessellated and redisplayed
+    """
+
+    def __init__(self):
+        self.kept = []
+        self.modified = []
+        self.deleted = []
+        self.changed = []
+
+    @classmethod
+    def from_algo(cls, algo, base, result):
+        history = cls()
+        base_faces = TopTools_IndexedMapOfShape()
+        topexp.MapShapes(base, TopAbs_FACE, base_faces)
+        kept = TopTools_IndexedMapOfShape()
+        for i in range(1, base_faces.Size() + 1):
+            face = base_faces.FindKey(i)
+            if algo.IsDeleted(face):
+                history.deleted.append(face)
+                continue
+            new_faces = list(iter_list_of_shape(algo.Modified(face)))
+            if new_faces:
+                history.modified.append((face, new_faces))
+            else:
+                history.kept.append(face)
+                kept.Add(face)
+        result_faces = TopTools_IndexedMapOfShape()
+        topexp.MapShapes(result, TopAbs_FACE, result_faces)
+        for i in range(1, result_faces.Size() + 1):
+            face = result_faces.FindKey(i)
+            if not kept.Contains(face):
+                history.changed.append(face)
+        return history
+
+    def summary(self):
+        return {
+            "kept": len(self.kept),
+            "modified": len(self.modified),
+            "deleted": len(self.deleted),
+            "changed": len(self.changed),
+        }
+
+
+def local_prism(base, face, distance):
+    """Extrude a face of base in place: a boss when distance > 0, a pocket otherwise.
+
+    Returns (result, FaceHistory). Only the faces around the selected one
+    are rebuilt by BRepFeat, the rest of the solid is shared with base.
+    """
+    if distance == 0:
+        raise ValueError("Extrusion distance must not be zero.")
+    direction = outward_normal(face)
+    fuse = 1 if distance > 0 else 0
+    if not fuse:
+        direction.Reverse()
+    prism = BRepFeat_MakePrism(base, face, face, gp_Dir(direction), fuse, True)
+    prism.Perform(abs(distance))
+    if not prism.IsDone():
+        raise RuntimeError("BRepFeat_MakePrism failed on the selected face.")
+    result = prism.Shape()
+    return result, FaceHistory.from_algo(prism, base, result)
+
+
+class LocalExtrudeFeature(Feature):
+    """Boss or pocket on a face of an existing solid, fused into that solid."""
+
+    kind = "local_extrude"
+
+    def __init__(self, base, face, distance):
+        super().__init__((base, face), distance=distance)
+        self.history = None
+
+    def compute(self, base, face):
+        result, self.history = local_prism(base, face, self.params["distance"])
+        return result
@@ -0,0 +1,181 @@
+import math
+
+from PyQt5.QtCore import QEvent, QObject, QTimer
+
+from OCC.Core.Bnd import Bnd_Box
+from OCC.Core.BRepBndLib import brepbndlib
+from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Copy
+from OCC.Core.gp import gp_Pnt
+
+from geometry_jobs import DEVIATION_COEFFICIENT, display_deflection, mesh_shape
+from stall_watchdog import operation
+
+# Relative deviation coefficients, coarse to fine. The middle level is the
+# default display quality, i.e. what the tessellation cache holds.
+LEVELS = (0.004, DEVIATION_COEFFICIENT, 0.00025)
+# Projected size in pixels above which the next finer level is used.
+THRESHOLDS = (120.0, 600.0)
+# Fraction of a threshold an object must move past before switching back,
+# so objects sitting on a boundary do not flip at every camera move.
+HYSTERESIS = 0.15
+# Redisplays per update pass; the rest is picked up by the next pass.
+MAX_SWITCHES = 32
+
+
+def mesh_level(progress, shape, coefficient):
+    """GeometryJobExecutor job: a copy of shape meshed for one LOD level."""
+    copy = BRepBuilderAPI_Copy(shape, True, False).Shape()
+    progress.check()
+    return mesh_shape(progress, copy, display_deflection(copy, coefficient))
+
+
+def pick_level(size, current, thresholds, hysteresis=HYSTERESIS):
+    """Level for an object of projected size now showing level current.
+
+    Each boundary is moved away from current by the hysteresis fraction,
+    so an object only switches once it is clearly past one, but may then
+    jump several levels at once.
+    """
+    for level in range(len(thresholds), current, -1):
+        if size >= thresholds[level - 1] * (1 + hysteresis):
+            return level
+    for level in range(current):
+        if size < thresholds[level] * (1 - hysteresis):
+            return level
+    return current
+
+
+class LodObject:
+    def __init__(self, key, ais, shape, level, n_levels):
+        self.key = key
+        self.ais = ais
+        self.levels = [None] * n_levels
+        self.levels[level] = shape
+        self.current = level
+        self.wanted = level
+        bbox = Bnd_Box()
+        brepbndlib.Add(shape, bbox)
+        xmin, ymin, zmin, xmax, ymax, zmax = bbox.Get()
+        self.center = gp_Pnt((xmin + xmax) / 2, (ymin + ymax) / 2, (zmin + zmax) / 2)
+        self.diameter = math.sqrt((xmax - xmin) ** 2 + (ymax - ymin) ** 2 + (zmax - zmin) ** 2)
+
+
+class LodManager(QObject):
+    """Per-object level of detail for a qtViewer3d.
+
+    Each tracked AIS_Shape can show one of several triangulations of its
+    shape. After the camera settles the level is picked from the projected
+    size of the object; missing levels are meshed on the job executor, so
+    fine meshes are only ever built for objects that come close.
+    """
+
+    def __init__(self, display, canvas, jobs, levels=LEVELS, thresholds=THRESHOLDS, parent=None):
+        super().__init__(parent)
+        self.display = display
+        self.canvas = canvas
+        self.jobs = jobs
+        self.levels = levels
+        self.thresholds = thresholds
+        self._objects = {}
+        self._jobs = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(120)
+        self._timer.timeout.connect(self._on_timer)
+        jobs.finished.connect(self._on_level_ready)
+        jobs.failed.connect(self._on_level_failed)
+        jobs.cancelled.connect(self._on_level_failed)
+        canvas.installEventFilter(self)
+
+    def track(self, key, ais, shape, level=1):
+        ais.Attributes().SetAutoTriangulation(False)
+        self._objects[key] = LodObject(key, ais, shape, level, len(self.levels))
+        self.schedule_update()
+
+    def untrack(self, key):
+        self._objects.pop(key, None)
+
+    def clear(self):
+        for job_id in list(self._jobs):
+            self.jobs.cancel(job_id)
+        self._jobs.clear()
+        self._objects.clear()
+
+    def schedule_update(self):
+        self._timer.start()
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Wheel, QEvent.MouseButtonRelease, QEvent.Resize, QEvent.KeyRelease):
+            self.schedule_update()
+        elif event.type() == QEvent.MouseMove and event.buttons():
+            # Keep pushing the timer back while the user rotates or pans
+            self.schedule_update()
+        return False
+
+    def _on_timer(self):
+        with operation("lod update"):
+            self.update()
+
+    def screen_size(self, obj):
+        camera = self.display.View.Camera()
+        depth = camera.Eye().Distance(obj.center)
+        view_height = camera.ViewDimensions(depth).Y()
+        if view_height <= 0:
+            return float("inf")
+        return obj.diameter / view_height * self.canvas.height()
+
+    def pick_level(self, obj, size):
+        return pick_level(size, obj.current, self.thresholds)
+
+    def update(self):
+        if not self._objects:
+            return
+        switched = 0
+        for obj in self._objects.values():
+            obj.wanted = self.pick_level(obj, self.screen_size(obj))
+            if obj.wanted == obj.current:
+                continue
+            if obj.levels[obj.wanted] is None:
+                self._request(obj, obj.wanted)
+            elif switched < MAX_SWITCHES:
+                self._switch(obj, obj.wanted)
+                switched += 1
+        if switched:
+            self.display.Context.UpdateCurrentViewer()
+        if switched >= MAX_SWITCHES:
+            self.schedule_update()
+
+    def level_counts(self):
+        counts = [0] * len(self.levels)
+        for obj in self._objects.values():
+            counts[obj.current] += 1
+        return counts
+
+    def _switch(self, obj, level):
+        obj.ais.SetShape(obj.levels[level])
+        self.display.Context.Redisplay(obj.ais, False)
+        obj.current = level
+
+    def _request(self, obj, level):
+        if (obj.key, level) in self._jobs.values():
+            return
+        source = next(s for s in obj.levels if s is not None)
+        job_id = self.jobs.submit(mesh_level, source, self.levels[level])
+        self._jobs[job_id] = (obj.key, level)
+
+    def _on_level_ready(self, job_id, shape):
+        request = self._jobs.pop(job_id, None)
+        if request is None:
+            return
+        key, level = request
+        obj = self._objects.get(key)
+        if obj is None:
+            return
+        obj.levels[level] = shape
+        if obj.wanted == level:
+            with operation("lod switch"):
+                self._switch(obj, level)
+                self.display.Context.UpdateCurrentViewer()
+
+    def _on_level_failed(self, job_id, *args):
+        self._jobs.pop(job_id, None)
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from perf_stats import peak_memory_bytes, summarize
+
+MACRO_VERSION = 1
+
+
+def camera_state(view):
+    camera = view.Camera()
+    eye, center, up = camera.Eye(), camera.Center(), camera.Up()
+    return {
+        "eye": [eye.X(), eye.Y(), eye.Z()],
+        "at": [center.X(), center.Y(), center.Z()],
+        "up": [up.X(), up.Y(), up.Z()],
+        "scale": camera.Scale(),
+    }
+
+
+def apply_camera_state(view, state):
+    from OCC.Core.gp import gp_Dir, gp_Pnt
+    camera = view.Camera()
+    camera.SetEye(gp_Pnt(*state["eye"]))
+    camera.SetCenter(gp_Pnt(*state["at"]))
+    camera.SetUp(gp_Dir(*state["up"]))
+    camera.SetScale(state["scale"])
+    view.Redraw()
+
+
+class MacroRecorder:
+    """Writes main2.py actions to a JSON lines script.
+
+    The first line is a header, then one action per line with the time
+    since recording started. Faces are recorded by their index in the
+    part's face map, which is stable for a given feature history, and
+    extrusions by their position among the part's extrusions: feature IDs
+    are not, as failed or cancelled extrusions use some up.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w")
+        self._t0 = time.perf_counter()
+        self._write({"version": MACRO_VERSION, "app": "main2"})
+
+    def record(self, action, **args):
+        self._write({"t": round(time.perf_counter() - self._t0, 4), "action": action, **args})
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        # Flushed per action so a crashed session still leaves a usable script
+        self._file.flush()
+
+
+def read_macro(path):
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("version") != MACRO_VERSION:
+        raise ValueError(f"{path} is not a version {MACRO_VERSION} macro")
+    return lines[1:]
+
+
+class MacroReplayer:
+    """Re-runs a recorded script against PartSession, without a window.
+
+    Each action is timed including the rebuild and meshing it triggers,
+    and with a renderer also the presentation update and a redraw.
+    """
+
+    def __init__(self, renderer=None):
+        self.renderer = renderer
+        self.session = None
+        self.presentations = None
+        self.latencies = {}
+        self.errors = []
+
+    def run(self, actions):
+        from part_session import PartSession
+        self.session = PartSession()
+        if self.presentations is not None:
+            # Repeated runs share the renderer: drop the previous run's part
+            self.presentations.clear()
+        elif self.renderer is not None:
+            from presentation import PresentationManager
+            self.presentations = PresentationManager(self.renderer)
+        self._timed("new_box", self._new_box, {})
+        for entry in actions:
+            action = entry["action"]
+            args = {k: v for k, v in entry.items() if k not in ("t", "action")}
+            handler = getattr(self, f"_{action}", None)
+            if handler is None:
+                self.errors.append(f"unknown action {action!r}")
+                continue
+            self._timed(action, handler, args)
+
+    def report(self):
+        return {action: summarize(seconds) for action, seconds in self.latencies.items()}
+
+    def _timed(self, action, handler, args):
+        start = time.perf_counter()
+        try:
+            handler(**args)
+        except Exception as e:
+            # A failing edit is part of the session being replayed: keep going
+            self.errors.append(f"{action} {args}: {e}")
+        self.latencies.setdefault(action, []).append(time.perf_counter() - start)
+
+    def _show(self, history=None, fit=False):
+        if self.presentations is not None:
+            self.presentations.show("part", self.session.shape, history=history, fit=fit)
+
+    def _new_box(self, dx=60.0, dy=60.0, dz=60.0):
+        self.session.new_box(dx, dy, dz)
+        self._show(fit=True)
+
+    def _select_face(self, face_id):
+        self.session.select_face_id(face_id)
+
+    def _extrude(self, distance, local=True):
+        self.session.rebuild(self.session.add_extrusion(distance, local))
+        self._show(self.session.history)
+
+    def _edit_extrusion(self, distance, extrusion=None, feature_id=None):
+        if extrusion is not None:
+            extrusions = self.session.extrusions()
+            if not 0 <= extrusion < len(extrusions):
+                raise ValueError(f"no extrusion #{extrusion}, the part has {len(extrusions)}")
+            feature_id = extrusions[extrusion]
+        self.session.rebuild(self.session.edit_extrusion(feature_id, distance))
+        self._show(self.session.history)
+
+    def _view(self, **state):
+        if self.renderer is not None:
+            apply_camera_state(self.renderer.View, state)
+
+
+def format_report(report, peak_rss=None, peak_python=None):
+    lines = [f"{'action':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+    for action, stats in report.items():
+        lines.append(
+            f"{action:<16}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['max_ms']:>10.1f}"
+        )
+    if peak_rss is not None:
+        lines.append(f"peak RSS: {peak_rss:.1f} MB")
+    if peak_python is not None:
+        lines.append(f"peak Python heap: {peak_python:.1f} MB")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a main2.py macro and report per-action latency.")
+    parser.add_argument("script", help="macro recorded with CAD_MACRO_RECORD")
+    parser.add_argument("--render", action="store_true", help="display results in an offscreen viewer")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the script this many times")
+    parser.add_argument("--tracemalloc", action="store_true", help="also trace the peak Python heap (slower)")
+    parser.add_argument("--json", metavar="PATH", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    actions = read_macro(args.script)
+    renderer = None
+    if args.render:
+        from OCC.Display.OCCViewer import OffscreenRenderer
+        renderer = OffscreenRenderer()
+    if args.tracemalloc:
+        tracemalloc.start()
+    replayer = MacroReplayer(renderer)
+    # Samples of every run are pooled into one set of percentiles
+    for _ in range(args.repeat):
+        replayer.run(actions)
+    peak_python = None
+    if args.tracemalloc:
+        peak_python = tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+        tracemalloc.stop()
+
+    report = replayer.report()
+    peak_rss = peak_memory_bytes()
+    if peak_rss is not None:
+        peak_rss /= 1024.0 * 1024.0
+    print(format_report(report, peak_rss, peak_python))
+    for error in replayer.errors:
+        print(f"error: {error}", file=sys.stderr)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "script": os.path.abspath(args.script),
+                "repeat": args.repeat,
+                "render": args.render,
+                "actions": report,
+                "peak_rss_mb": peak_rss,
+                "peak_python_mb": peak_python,
+                "errors": replayer.errors,
+            }, f, indent=2)
+    return 1 if replayer.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,29 @@
 import os
 import sys
-from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+from startup import lazy_import, profile
 from PyQt5.QtWidgets import (
-    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QWidget, QLabel
+    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QWidget, QLabel, QFileDialog, QMessageBox
 )
-from PyQt5.QtCore import Qt, QPoint, QEvent
-from OCC.Display.backend import load_backend
-
-load_backend("pyqt5")
-import OCC.Display.qtDisplay as qtDisplay
+from PyQt5.QtCore import Qt, QPoint, QEvent, QTimer
 from PyQt5.QtGui import QCursor
 
+profile.mark("qt imported")
+
+# Everything below pulls in OCC; it only loads on first use, once the window is on screen
+presentation = lazy_import("presentation")
+input_pipeline = lazy_import("input_pipeline")
+live_resize = lazy_import("live_resize")
+perf_hud = lazy_import("perf_hud")
+mesh_cache = lazy_import("mesh_cache")
+model_io = lazy_import("model_io")
+geometry_jobs = lazy_import("geometry_jobs")
+lod = lazy_import("lod")
+batch_display = lazy_import("batch_display")
+chunked_loader = lazy_import("chunked_loader")
+stall_watchdog = lazy_import("stall_watchdog")
+tracing = lazy_import("tracing")
+pointcloud_octree = lazy_import("pointcloud_octree")
+
 class CustomTitleBar(QWidget):
     def __init__(self, parent=None, title="cad-python"):
         super().__init__(parent)
@@ -83,7 +96,7 @@ class CustomTitleBar(QWidget):
 
 class App(QDialog):
     BORDER_WIDTH = 2  # px, smaller border
-    def __init__(self):
+    def __init__(self, live_resize="letterbox"):
         super().__init__()
         self.setObjectName("MainWindow")
         self.title = "cad-python"
@@ -97,15 +110,36 @@ class App(QDialog):
         self._mouse_press_pos = None
         self._mouse_press_geom = None
         self._cursor_overridden = False  # Track override state
+        self._live_resize_mode = live_resize  # "off", "scale" or "letterbox"
+        self.canvas = None  # Created once the frame has been painted
+        self.display = None
+        self.live_resize = None
+        self.hud = None
+        self.jobs = None
+        self._open_job = None
+        self._open_path = None
+        self._fitted = False
+        self.cloud = None
+        self.watchdog = None
+        self._viewer_scheduled = False
         self.setMouseTracking(True)  # Enable mouse tracking for main window
         self.installEventFilter(self)  # Install event filter on self
         self.initUI()
 
     def eventFilter(self, obj, event):
-        # Always update cursor on mouse move, release, enter, leave
-        if event.type() in (QEvent.MouseMove, QEvent.MouseButtonRelease, QEvent.Enter, QEvent.Leave):
+        etype = event.type()
+        if etype == QEvent.MouseMove:
+            if self.canvas is not None and obj is self.canvas:
+                # The canvas sits inside the border margins, it never needs hit-testing
+                if self._cursor_overridden and not self._resizing:
+                    self._update_cursor(None)
+            else:
+                pos = obj.mapTo(self, event.pos())
+                if self._cursor_overridden or self._in_border_band(pos):
+                    self._update_cursor(pos)
+        elif etype in (QEvent.MouseButtonRelease, QEvent.Enter, QEvent.Leave):
             # Get mouse position relative to self
-            if event.type() in (QEvent.MouseMove, QEvent.MouseButtonRelease):
+            if etype == QEvent.MouseButtonRelease:
                 pos = obj.mapTo(self, event.pos())
             else:
                 pos = self.mapFromGlobal(QCursor.pos())
@@ -135,6 +169,13 @@ class App(QDialog):
         top_bar_layout = QHBoxLayout(top_bar)
         top_bar_layout.setContentsMargins(10, 10, 10, 10)
         top_bar_layout.setSpacing(10)
+        open_btn = QPushButton("Open...", top_bar)
+        open_btn.clicked.connect(self.on_open)
+        top_bar_layout.addWidget(open_btn)
+        hud_btn = QPushButton("HUD", top_bar)
+        hud_btn.setCheckable(True)
+        hud_btn.toggled.connect(self.set_hud_visible)
+        top_bar_layout.addWidget(hud_btn)
         btn1 = QPushButton("Button 1", top_bar)
         btn2 = QPushButton("Button 2", top_bar)
         top_bar_layout.addWidget(btn1)
@@ -142,18 +183,81 @@ class App(QDialog):
         top_bar_layout.addStretch(1)
         main_layout.addWidget(top_bar, 0)
 
-        # 3D Viewer area
-        self.canvas = qtDisplay.qtViewer3d(self)
+        # 3D Viewer area, a placeholder until the OCCT driver is up
+        self._viewer_placeholder = QWidget(self)
+        self._viewer_placeholder.setStyleSheet("background-color: #15171c;")
+        main_layout.addWidget(self._viewer_placeholder, 1)
+        self.setLayout(main_layout)
+        self.show()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._viewer_scheduled:
+            # The frame is on screen: now pay for OCC imports and driver init
+            self._viewer_scheduled = True
+            profile.mark("first paint")
+            self.watchdog = stall_watchdog.install("main", self)
+            QTimer.singleShot(0, self._init_viewer)
+
+    def closeEvent(self, event):
+        if self.jobs is not None:
+            self.jobs.shutdown()
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        super().closeEvent(event)
+
+    def _init_viewer(self):
+        with stall_watchdog.operation("init viewer"):
+            self._create_viewer()
+        QTimer.singleShot(0, self._build_default_scene)
+
+    def _create_viewer(self):
+        from OCC.Display.backend import load_backend
+        load_backend("pyqt5")
+        if tracing.ENABLED:
+            tracing.install()
+        self.canvas = input_pipeline.CoalescingViewer(self)
+        profile.mark("occ imported")
         self.canvas.setSizePolicy(self.canvas.sizePolicy().Expanding, self.canvas.sizePolicy().Expanding)
         self.canvas.setMouseTracking(True)
         self.canvas.installEventFilter(self)
-        main_layout.addWidget(self.canvas, 1)
-        self.setLayout(main_layout)
-        self.show()
+        self.layout().replaceWidget(self._viewer_placeholder, self.canvas)
+        self._viewer_placeholder.deleteLater()
+        self.canvas.show()
         self.canvas.InitDriver()
         self.display = self.canvas._display
+        profile.mark("driver initialized")
+        self.live_resize = live_resize.LiveResize(self, self.canvas, mode=self._live_resize_mode)
+        self.presentations = presentation.PresentationManager(self.display)
         self.set_occt_background()
-        self.displayCube()
+
+    def _build_default_scene(self):
+        with stall_watchdog.operation("default scene"):
+            self.displayCube()
+        profile.mark("default scene displayed")
+        profile.finish()
+
+    def _ensure_loading(self):
+        # Model loading machinery, set up on the first Open
+        if self.jobs is not None:
+            return
+        self.mesh_cache = mesh_cache.TessellationCache()
+        self.jobs = geometry_jobs.GeometryJobExecutor(parent=self)
+        self.lod = lod.LodManager(self.display, self.canvas, self.jobs, parent=self)
+        self.loader = chunked_loader.ChunkedDisplayScheduler(self.display, budget_ms=8.0, parent=self)
+        self.loader.displayed.connect(self.on_part_displayed)
+        self.loader.progressed.connect(self.on_load_progress)
+        self.loader.finished.connect(self.on_load_finished)
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.failed.connect(self.on_job_failed)
+
+    def set_hud_visible(self, visible):
+        if self.display is None:
+            return
+        if self.hud is None:
+            self.perf = perf_hud.PerfCounters(self.display, self.canvas.frames)
+            self.hud = perf_hud.PerfHud(self.canvas, self.perf, self)
+        self.hud.set_visible(visible)
 
     def set_occt_background(self):
         # Set a dark gradient background for the OCCT viewer
@@ -164,10 +268,85 @@ class App(QDialog):
             self.display.View.SetBgGradientColors(dark1, dark2, 2)
 
     def displayCube(self):
+        from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
         cube = BRepPrimAPI_MakeBox(50.0, 50.0, 50.0).Shape()
-        self.display.EraseAll()
-        self.ais_cube = self.display.DisplayShape(cube)[0]
+        self.ais_cube = self.presentations.show("cube", cube, fit=True)
+
+    def on_open(self):
+        if self.display is None:
+            return
+        filters = f"{model_io.MODEL_FILTER};;{pointcloud_octree.CLOUD_FILTER}"
+        path, _ = QFileDialog.getOpenFileName(self, "Open Model", "", filters)
+        if path:
+            self.open_model(path)
+
+    def open_model(self, path):
+        self._ensure_loading()
+        if self._open_job is not None:
+            self.jobs.cancel(self._open_job)
+        with stall_watchdog.operation("close model"):
+            self.loader.cancel()
+            self.lod.clear()
+            self.presentations.clear()
+            if self.cloud is not None:
+                self.cloud.clear()
+                self.cloud.deleteLater()
+                self.cloud = None
+        self._open_path = path
+        if pointcloud_octree.is_point_cloud(path):
+            # Built once into the octree cache, then streamed node by node
+            self.title_bar.title_label.setText(f"{self.title} - indexing point cloud")
+            self._open_job = self.jobs.submit(pointcloud_octree.cached_octree, path)
+            return
+        # Import and meshing (or a warm cache read) happen on a worker thread,
+        # the parts are then displayed in time-sliced chunks on the GUI thread
+        self._open_job = self.jobs.submit(chunked_loader.load_parts, self.mesh_cache, path)
+
+    def on_job_finished(self, job_id, parts):
+        if job_id != self._open_job:
+            return
+        self._open_job = None
+        if isinstance(parts, pointcloud_octree.Octree):
+            self.show_point_cloud(parts)
+            return
+        self._fitted = False
+        self.loader.enqueue_many((f"{self._open_path}#{i}", part, size) for i, (size, part) in enumerate(parts))
+
+    def on_job_failed(self, job_id, message):
+        if job_id != self._open_job:
+            return
+        self._open_job = None
+        self.title_bar.title_label.setText(self.title)
+        QMessageBox.critical(self, "Open Failed", f"Could not open {self._open_path}: {message}")
+
+    def show_point_cloud(self, octree):
+        self.title_bar.title_label.setText(self.title)
+        self.cloud = pointcloud_octree.OctreeCloudView(self.display, self.canvas, self.jobs, octree, parent=self)
+        with stall_watchdog.operation("show point cloud"):
+            self.cloud.show()
+
+    def on_part_displayed(self, key, ais, shape):
+        self.presentations.adopt(key, ais, shape)
+        # Each part then switches between coarse/default/fine meshes with its screen size
+        self.lod.track(key, ais, shape)
+
+    def on_load_progress(self, done, total):
+        self.title_bar.title_label.setText(f"{self.title} - loading {done}/{total}")
+        if not self._fitted:
+            # The first chunk holds the largest parts, good enough to frame the model
+            self.display.FitAll()
+            self._fitted = True
+
+    def on_load_finished(self, seconds):
+        self.title_bar.title_label.setText(self.title)
         self.display.FitAll()
+        self.display.Context.UpdateCurrentViewer()
+
+    def display_shapes(self, items, fit=True):
+        # Bulk entry point: items are shapes or (shape, color, material, transparency)
+        ais_objects, timings = batch_display.display_batch(self.display, items, fit=fit)
+        batch_display.log.info(batch_display.format_timings(timings, len(ais_objects)))
+        return ais_objects
 
     def custom_stylesheet(self):
         # Border only on the main window, not on all widgets
@@ -239,13 +418,22 @@ class App(QDialog):
         super().mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event):
+        if self._resizing and self.live_resize is not None:
+            self.live_resize.settle()
         self._resizing = False
         self._resize_dir = None
         # Update cursor after resizing in case mouse is not on border
         self._update_cursor(event.pos())
         super().mouseReleaseEvent(event)
 
+    def _in_border_band(self, pos):
+        bw = self.BORDER_WIDTH
+        x, y = pos.x(), pos.y()
+        return x <= bw or y <= bw or x >= self.width() - bw or y >= self.height() - bw
+
     def _get_resize_direction(self, pos):
+        if pos is None:
+            return None
         x, y, w, h = pos.x(), pos.y(), self.width(), self.height()
         bw = self.BORDER_WIDTH
         left = x <= bw
@@ -321,6 +509,8 @@ class App(QDialog):
             if new_h >= min_height:
                 h = new_h
         self.setGeometry(x, y, w, h)
+        if self.live_resize is not None:
+            self.live_resize.moved()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -1,40 +1,92 @@
+import os
 import sys
-from PyQt5.QtWidgets import QApplication, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QGroupBox, QInputDialog, QMessageBox
-from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox, BRepPrimAPI_MakePrism
-from OCC.Core.gp import gp_Vec
-from OCC.Extend.TopologyUtils import TopologyExplorer
-from OCC.Core.TopoDS import topods
-from OCC.Core.BRep import BRep_Tool
-from OCC.Core.Geom import Geom_Plane
-from OCC.Display.backend import load_backend
-
-load_backend("pyqt5")
-import OCC.Display.qtDisplay as qtDisplay
+from startup import lazy_import, profile
+from PyQt5.QtWidgets import QApplication, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QGroupBox, QInputDialog, QMessageBox, QProgressDialog, QCheckBox, QWidget
+from PyQt5.QtCore import QEvent, Qt, QTimer
+
+profile.mark("qt imported")
+
+# OCC-backed modules load on first use, once the window is on screen
+geometry_jobs = lazy_import("geometry_jobs")
+feature_tree = lazy_import("feature_tree")
+part_session = lazy_import("part_session")
+presentation = lazy_import("presentation")
+macro = lazy_import("macro")
+stall_watchdog = lazy_import("stall_watchdog")
+tracing = lazy_import("tracing")
 
 class CADApp(QDialog):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("cad-python")
         self.setGeometry(100, 100, 800, 600)
-        self.selected_face = None
-        self.shape = None
+        self.session = None
         self.ais_shape = None
+        self.canvas = None  # Created once the window has been painted
+        self.display = None
+        self.jobs = None
+        self._rebuild_job = None
+        self._rollback = None
+        self._progress_dialog = None
+        self._pending_action = None
+        self._viewer_scheduled = False
+        self.recorder = None
+        self.watchdog = None
         self.initUI()
-        self.display_cube()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._viewer_scheduled:
+            # The window is on screen: now pay for OCC imports and driver init
+            self._viewer_scheduled = True
+            profile.mark("first paint")
+            self.watchdog = stall_watchdog.install("main2", self)
+            QTimer.singleShot(0, self._init_viewer)
+
+    def _init_viewer(self):
+        from OCC.Display.backend import load_backend
+        load_backend("pyqt5")
+        if tracing.ENABLED:
+            tracing.install()
+        import OCC.Display.qtDisplay as qtDisplay
+        profile.mark("occ imported")
+        self.canvas = qtDisplay.qtViewer3d(self)
+        self.layout().replaceWidget(self._viewer_placeholder, self.canvas)
+        self._viewer_placeholder.deleteLater()
+        self.canvas.show()
+        self.canvas.InitDriver()
+        self.display = self.canvas._display
+        profile.mark("driver initialized")
+        self.presentations = presentation.PresentationManager(self.display, style=self.style_shape)
+        self.session = part_session.PartSession()
+        self.jobs = geometry_jobs.GeometryJobExecutor(parent=self)
+        self.jobs.finished.connect(self.on_job_finished)
+        self.jobs.failed.connect(self.on_job_failed)
+        self.jobs.cancelled.connect(self.on_job_cancelled)
+        self.jobs.progress.connect(self.on_job_progress)
+        if os.environ.get("CAD_MACRO_RECORD"):
+            self.start_recording(os.environ["CAD_MACRO_RECORD"])
+        QTimer.singleShot(0, self._build_default_scene)
+
+    def _build_default_scene(self):
+        with stall_watchdog.operation("default scene"):
+            self.display_cube()
         self.set_face_selection_mode()
+        self.controls.setEnabled(True)
+        profile.mark("default scene displayed")
+        profile.finish()
 
     def initUI(self):
         main_layout = QVBoxLayout()
         self.setLayout(main_layout)
 
-        # 3D Viewer
-        self.canvas = qtDisplay.qtViewer3d(self)
-        self.canvas.InitDriver()
-        self.display = self.canvas._display
-        main_layout.addWidget(self.canvas)
+        # 3D Viewer, a placeholder until the OCCT driver is up
+        self._viewer_placeholder = QWidget(self)
+        main_layout.addWidget(self._viewer_placeholder, 1)
 
         # Controls
-        controls = QGroupBox("Controls")
+        self.controls = controls = QGroupBox("Controls")
+        controls.setEnabled(False)
         controls_layout = QHBoxLayout()
         controls.setLayout(controls_layout)
         main_layout.addWidget(controls)
@@ -43,6 +95,32 @@ class CADApp(QDialog):
         self.extrude_btn.clicked.connect(self.on_extrude)
         controls_layout.addWidget(self.extrude_btn)
 
+        self.local_check = QCheckBox("Fuse into solid", self)
+        self.local_check.setToolTip("Add or remove material on the selected face instead of replacing the part")
+        self.local_check.setChecked(True)
+        controls_layout.addWidget(self.local_check)
+
+        self.edit_btn = QPushButton("Edit Extrusion...", self)
+        self.edit_btn.clicked.connect(self.on_edit_extrusion)
+        controls_layout.addWidget(self.edit_btn)
+
+    def start_recording(self, path):
+        self.recorder = macro.MacroRecorder(path)
+        # Camera changes are recorded once the view has settled
+        self._view_timer = QTimer(self)
+        self._view_timer.setSingleShot(True)
+        self._view_timer.setInterval(250)
+        self._view_timer.timeout.connect(self._record_view)
+        self.canvas.installEventFilter(self)
+
+    def _record_view(self):
+        self.recorder.record("view", **macro.camera_state(self.display.View))
+
+    def eventFilter(self, obj, event):
+        if obj is self.canvas and event.type() in (QEvent.MouseButtonRelease, QEvent.Wheel):
+            self._view_timer.start()
+        return super().eventFilter(obj, event)
+
     def display_cube(self):
         # Set light grey background
         if hasattr(self.display, 'View'):
@@ -52,70 +130,136 @@ class CADApp(QDialog):
             white = Quantity_Color(1.0, 1.0, 1.0, Quantity_TOC_RGB)
             self.display.View.SetBgGradientColors(light_grey, white, 2)
         # Create and display a cube
-        self.shape = BRepPrimAPI_MakeBox(60.0, 60.0, 60.0).Shape()
-        self.display.EraseAll()
-        self.ais_shape = self.display.DisplayShape(self.shape, update=True)[0]
+        self.show_shape(self.session.new_box(60.0, 60.0, 60.0), fit=True)
+
+    def style_shape(self, ais_shape):
         # Set edge color and width
         from OCC.Core.Quantity import Quantity_NOC_CYAN1, Quantity_Color
         from OCC.Core.Prs3d import Prs3d_Drawer
-        ctx = self.display.Context
-        drawer = self.ais_shape.Attributes()
+        drawer = ais_shape.Attributes()
         drawer.SetWireAspect(Prs3d_Drawer().WireAspect())
         drawer.WireAspect().SetColor(Quantity_Color(Quantity_NOC_CYAN1))
         drawer.WireAspect().SetWidth(2.0)
-        ctx.Redisplay(self.ais_shape, True)
-        self.display.FitAll()
+
+    def show_shape(self, shape, history=None, fit=False):
+        # Updates the part presentation in place, only changed faces are re-meshed
+        with stall_watchdog.operation("show part"):
+            self.ais_shape = self.presentations.show("part", shape, history=history, fit=fit)
 
     def set_face_selection_mode(self):
         # Set selection mode to face
         self.display.SetSelectionModeFace()
-        self.display.register_select_callback(self.on_face_selected)
+        self.display.register_select_callback(self.on_shapes_selected)
 
-    def on_face_selected(self, shapes, x=None, y=None):
-        # Called when a face is selected
-        for shape in shapes:
-            if shape.ShapeType() == 4:  # TopAbs_FACE
-                self.selected_face = topods.Face(shape)
-                self.display.Context.SetSelected(self.ais_shape, True)
-                return
-        self.selected_face = None
+    def on_shapes_selected(self, shapes, x=None, y=None):
+        # pythonocc hands over the picked TopoDS shapes: map them to part IDs
+        face_ids = [i for kind, i in self.session.selection_ids(shapes) if kind == "face"]
+        self.on_face_selected(face_ids[0] if face_ids else None)
+
+    def on_face_selected(self, face_id):
+        self.session.select_face_id(face_id)
+        if face_id is not None:
+            self.display.Context.SetSelected(self.ais_shape, True)
+        if self.recorder is not None:
+            self.recorder.record("select_face", face_id=face_id)
 
     def on_extrude(self):
-        if self.selected_face is None:
+        if self.session.selected_face_id is None:
             QMessageBox.warning(self, "No Face Selected", "Please select a face to extrude.")
             return
         # Ask user for extrusion distance
         dist, ok = QInputDialog.getDouble(self, "Extrude", "Enter extrusion distance:", 20.0, -1000.0, 1000.0, 2)
         if not ok:
             return
-        # Get normal direction of the face
-        surf = BRep_Tool.Surface(self.selected_face)
-        plane = Geom_Plane.DownCast(surf)
-        if plane is None:
-            QMessageBox.warning(self, "Not a Planar Face", "Selected face is not planar and cannot be extruded.")
-            return
-        direction = plane.Axis().Direction()
-        vec = gp_Vec(direction.X(), direction.Y(), direction.Z())
-        # Extrude the face using BRepPrimAPI_MakePrism
+        local = self.local_check.isChecked()
         try:
-            extruded = BRepPrimAPI_MakePrism(self.selected_face, vec.Scaled(dist)).Shape()
-        except Exception as e:
-            QMessageBox.critical(self, "Extrusion Failed", f"Extrusion operation failed: {e}")
+            rollback = self.session.add_extrusion(dist, local=local)
+        except ValueError as e:
+            QMessageBox.warning(self, "Cannot Extrude", str(e))
             return
-        self.shape = extruded
-        self.display.EraseAll()
-        self.ais_shape = self.display.DisplayShape(self.shape, update=True)[0]
-        # Set edge color and width
-        from OCC.Core.Quantity import Quantity_NOC_CYAN1, Quantity_Color
-        from OCC.Core.Prs3d import Prs3d_Drawer
-        ctx = self.display.Context
-        drawer = self.ais_shape.Attributes()
-        drawer.SetWireAspect(Prs3d_Drawer().WireAspect())
-        drawer.WireAspect().SetColor(Quantity_Color(Quantity_NOC_CYAN1))
-        drawer.WireAspect().SetWidth(2.0)
-        ctx.Redisplay(self.ais_shape, True)
-        self.display.FitAll()
-        self.selected_face = None
+        self._pending_action = ("extrude", {"distance": dist, "local": local})
+        self._start_rebuild("Extruding...", rollback)
+
+    def on_edit_extrusion(self):
+        tree = self.session.tree
+        extrusions = self.session.extrusions()
+        if not extrusions:
+            QMessageBox.information(self, "No Extrusion", "There is no extrusion to edit yet.")
+            return
+        labels = [f"#{fid} {tree.features[fid].label()}" for fid in extrusions]
+        label, ok = QInputDialog.getItem(self, "Edit Extrusion", "Extrusion:", labels, len(labels) - 1, False)
+        if not ok:
+            return
+        index = labels.index(label)
+        feature_id = extrusions[index]
+        current = tree.features[feature_id].params["distance"]
+        dist, ok = QInputDialog.getDouble(self, "Edit Extrusion", "Enter extrusion distance:", current, -1000.0, 1000.0, 2)
+        if not ok or dist == current:
+            return
+        # Only this feature and the ones built on it are recomputed
+        self._pending_action = ("edit_extrusion", {"extrusion": index, "distance": dist})
+        self._start_rebuild("Rebuilding...", self.session.edit_extrusion(feature_id, dist))
+
+    def _start_rebuild(self, label, rollback):
+        # Rebuild and mesh on a worker thread, the result comes back in on_job_finished
+        self.extrude_btn.setEnabled(False)
+        self.edit_btn.setEnabled(False)
+        self._rollback = rollback
+        self._rebuild_job = self.jobs.submit(feature_tree.recompute_job, self.session.tree)
+        self._progress_dialog = QProgressDialog(label, "Cancel", 0, 100, self)
+        self._progress_dialog.setWindowModality(Qt.WindowModal)
+        self._progress_dialog.setMinimumDuration(300)
+        self._progress_dialog.canceled.connect(lambda: self.jobs.cancel(self._rebuild_job))
+        self._progress_dialog.setValue(0)
+
+    def on_job_progress(self, job_id, fraction, stage):
+        if job_id == self._rebuild_job and self._progress_dialog is not None:
+            if stage:
+                self._progress_dialog.setLabelText(f"{stage.capitalize()}...")
+            self._progress_dialog.setValue(int(fraction * 100))
+
+    def on_job_finished(self, job_id, result):
+        if job_id != self._rebuild_job:
+            return
+        if self.recorder is not None and self._pending_action is not None:
+            # Recorded once it succeeded: cancelled edits are not part of the session
+            action, args = self._pending_action
+            self.recorder.record(action, **args)
+        self._end_rebuild_job()
+        shape, _ = result
+        history = self.session.apply(shape)
+        self.show_shape(shape, history)
+
+    def on_job_failed(self, job_id, message):
+        if job_id != self._rebuild_job:
+            return
+        self._end_rebuild_job(rollback=True)
+        QMessageBox.critical(self, "Extrusion Failed", f"Extrusion operation failed: {message}")
+
+    def on_job_cancelled(self, job_id):
+        if job_id == self._rebuild_job:
+            self._end_rebuild_job(rollback=True)
+
+    def _end_rebuild_job(self, rollback=False):
+        if rollback and self._rollback is not None:
+            self._rollback()
+        self._rollback = None
+        self._pending_action = None
+        self._rebuild_job = None
+        if self._progress_dialog is not None:
+            self._progress_dialog.reset()
+            self._progress_dialog = None
+        self.extrude_btn.setEnabled(True)
+        self.edit_btn.setEnabled(True)
+
+    def closeEvent(self, event):
+        if self.jobs is not None:
+            self.jobs.shutdown()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
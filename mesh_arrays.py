@@ -0,0 +1,142 @@
+import os
+
+import numpy as np
+
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.TopAbs import TopAbs_FACE
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import topods
+from OCC.Core.Tesselator import ShapeTesselator
+
+from geometry_jobs import DEVIATION_ANGLE, DEVIATION_COEFFICIENT, display_deflection
+from topology_index import TopologyIndex
+
+# One binary STL facet: normal, three corners, attribute byte count
+STL_RECORD = np.dtype([("normal", "<f4", (3,)), ("corners", "<f4", (3, 3)), ("attribute", "<u2")])
+STL_HEADER = 84
+# ShapeTesselator mesh quality: a deflection coarser than any display one,
+# so its meshing pass keeps the triangulation already on the shape
+_KEEP_MESH = 1e3
+
+
+class MeshArrays:
+    """A triangle mesh as contiguous arrays.
+
+    vertices (n, 3) float32 or float64, normals (n, 3) float32 or None,
+    triangles (m, 3) int32 and face_ids (m,) int32, the TopologyIndex face ID each triangle comes
+    from (-1 for a mesh without B-Rep faces).
+    """
+
+    def __init__(self, vertices, normals, triangles, face_ids):
+        self.vertices = vertices
+        self.normals = normals
+        self.triangles = triangles
+        self.face_ids = face_ids
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def corners(self):
+        """(m, 3, 3) corner positions, e.g. for matplotlib's Poly3DCollection."""
+        return self.vertices[self.triangles]
+
+
+def read_stl_records(path):
+    """Facets of a binary STL as a structured array, read with one call."""
+    if os.path.getsize(path) <= STL_HEADER:
+        return np.empty(0, dtype=STL_RECORD)
+    return np.fromfile(path, dtype=STL_RECORD, offset=STL_HEADER)
+
+
+def face_triangle_counts(shape):
+    """(face_ids, triangle counts) of the faces in explorer order, the order STL writers use."""
+    topology = TopologyIndex(shape)
+    ids, counts = [], []
+    explorer = TopExp_Explorer(shape, TopAbs_FACE)
+    while explorer.More():
+        face = topods.Face(explorer.Current())
+        explorer.Next()
+        triangulation = BRep_Tool.Triangulation(face, TopLoc_Location())
+        ids.append(topology.face_id(face))
+        counts.append(triangulation.NbTriangles() if triangulation is not None else 0)
+    return np.array(ids, dtype=np.int32), np.array(counts, dtype=np.int64)
+
+
+def triangle_soup(shape, dtype=np.float32):
+    """(corners, normals), both (m, 3, 3), of the shape's existing triangulation.
+
+    ShapeTesselator walks the Poly_Triangulation of every face in C++, in
+    explorer order, applying locations and face orientation, and returns
+    all coordinates as one flat tuple; np.fromiter with a known count fills
+    a preallocated array from it. No gp_Pnt or Poly_Triangle is created
+    per node or triangle, and nothing goes through a file.
+    """
+    tess = ShapeTesselator(shape)
+    tess.Compute(compute_edges=False, mesh_quality=_KEEP_MESH, parallel=False)
+    count = tess.ObjGetTriangleCount() * 9
+    corners = np.fromiter(tess.GetVerticesPositionAsTuple(), dtype=dtype, count=count)
+    normals = np.fromiter(tess.GetNormalsAsTuple(), dtype=np.float32, count=count)
+    return corners.reshape(-1, 3, 3), normals.reshape(-1, 3, 3)
+
+
+def weld(corners, keys=None, tolerance=None):
+    """Merge equal corners of a triangle soup: (vertices, int32 triangles).
+
+    corners is (m, 3, 3). keys, one int per triangle, keeps corners of
+    different keys apart (e.g. face IDs, so that creases stay sharp). With
+    a tolerance corners closer than it are merged, else equal bits are.
+    """
+    points = corners.reshape(-1, 3)
+    if tolerance is not None:
+        rows = np.round(points / tolerance).astype(np.int64)
+    else:
+        # Equal coordinates have equal bits once -0.0 is folded into 0.0
+        rows = (points + points.dtype.type(0)).view(np.int32 if points.dtype.itemsize == 4 else np.int64)
+    if keys is not None:
+        rows = np.column_stack([np.repeat(keys, 3).astype(rows.dtype), rows])
+    _, first, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+    return points[first], inverse.reshape(-1, 3).astype(np.int32)
+
+
+def vertex_normals(vertices, triangles, facet_normals=None):
+    """Area-weighted average of the normals of the triangles around each vertex."""
+    v0, v1, v2 = (vertices[triangles[:, i]].astype(np.float64) for i in range(3))
+    weighted = np.cross(v1 - v0, v2 - v0)
+    if facet_normals is not None:
+        # Keep the writer's orientation where the winding is degenerate
+        weighted = np.where(np.linalg.norm(weighted, axis=1)[:, None] > 0, weighted, facet_normals)
+    normals = np.zeros((len(vertices), 3))
+    for i in range(3):
+        np.add.at(normals, triangles[:, i], weighted)
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1.0
+    return (normals / lengths[:, None]).astype(np.float32)
+
+
+def shape_mesh_arrays(shape, coefficient=DEVIATION_COEFFICIENT, dtype=np.float32, weld_mode="face", tolerance=None):
+    """Mesh a shape for display and return it as MeshArrays, vertices of dtype.
+
+    weld_mode "face" shares vertices inside each face (smooth normals,
+    sharp edges), "shape" also across faces (a connected mesh for slicing
+    or export) and "none" skips welding and keeps three vertices per
+    triangle.
+    """
+    BRepMesh_IncrementalMesh(shape, display_deflection(shape, coefficient), False, DEVIATION_ANGLE, True)
+    ids, counts = face_triangle_counts(shape)
+    corners, corner_normals = triangle_soup(shape, dtype)
+    if counts.sum() != len(corners):
+        raise RuntimeError(f"{len(corners)} triangles tessellated, {counts.sum()} expected")
+    face_ids = np.repeat(ids, counts)
+    if weld_mode == "none":
+        vertices = corners.reshape(-1, 3)
+        normals = corner_normals.reshape(-1, 3)
+        triangles = np.arange(len(vertices), dtype=np.int32).reshape(-1, 3)
+    else:
+        keys = face_ids if weld_mode == "face" else None
+        if weld_mode == "shape" and tolerance is None:
+            tolerance = display_deflection(shape, coefficient) * 1e-3
+        vertices, triangles = weld(corners, keys, tolerance)
+        normals = vertex_normals(vertices, triangles, corner_normals.mean(axis=1))
+    return MeshArrays(np.ascontiguousarray(vertices), normals, triangles, face_ids)
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import tempfile
+
+from OCC import VERSION as OCC_VERSION
+from OCC.Core.BinTools import bintools
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.BRepTools import breptools
+from OCC.Core.TopoDS import TopoDS_Shape
+from OCC.Core.TopTools import TopTools_FormatVersion_CURRENT
+
+from geometry_jobs import DEVIATION_ANGLE, DEVIATION_COEFFICIENT, display_deflection
+from model_io import load_shape
+from tracing import span
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "cad-python", "meshes")
+DEFAULT_BUDGET = 2 * 1024 ** 3
+_CHUNK = 1 << 20
+
+
+def fingerprint_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return "file:" + digest.hexdigest()
+
+
+def fingerprint_shape(shape):
+    # Hash of the BRep text without triangulations, so the same geometry
+    # gives the same key whether or not it has been meshed already.
+    fd, path = tempfile.mkstemp(suffix=".brep")
+    os.close(fd)
+    try:
+        breptools.Write(shape, path, False, False, TopTools_FormatVersion_CURRENT)
+        return "shape:" + fingerprint_file(path)[5:]
+    finally:
+        os.remove(path)
+
+
+class TessellationCache:
+    """Content-addressed on-disk store of meshed shapes.
+
+    Entries are binary BRep files (BinTools) that carry the triangulations,
+    keyed by the geometry fingerprint, the deflection settings and the OCC
+    version. Least recently used entries are evicted above the disk budget.
+    """
+
+    def __init__(self, directory=None, budget=None):
+        self.directory = directory or os.environ.get("CAD_MESH_CACHE", DEFAULT_DIRECTORY)
+        if budget is None:
+            budget = int(os.environ.get("CAD_MESH_CACHE_BUDGET_MB", 0)) * 1024 ** 2 or DEFAULT_BUDGET
+        self.budget = budget
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, fingerprint, coefficient=DEVIATION_COEFFICIENT, angle=DEVIATION_ANGLE):
+        text = f"{fingerprint}|{coefficient:.9g}|{angle:.9g}|{OCC_VERSION}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".bbrep")
+
+    def get(self, key):
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        shape = TopoDS_Shape()
+        try:
+            with span("cache.read", bytes=os.path.getsize(path)):
+                ok = bintools.Read(shape, path)
+        except RuntimeError:
+            ok = False
+        if not ok or shape.IsNull():
+            # Truncated or from an incompatible build: drop it.
+            os.remove(path)
+            return None
+        os.utime(path)  # mtime is the LRU clock
+        return shape
+
+    def put(self, key, shape):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            with span("cache.write"):
+                ok = bintools.Write(shape, tmp)
+            # A failed write leaves the previous entry, if any, in place
+            if ok:
+                os.replace(tmp, self.path(key))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".bbrep"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.budget:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".bbrep"):
+                os.remove(entry.path)
+
+    def mesh(self, shape, fingerprint=None, coefficient=DEVIATION_COEFFICIENT, angle=DEVIATION_ANGLE):
+        """Return (meshed shape, hit). On a hit the cached shape replaces shape."""
+        key = self.key(fingerprint or fingerprint_shape(shape), coefficient, angle)
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+        return self._mesh_and_store(key, shape, coefficient, angle), False
+
+    def load(self, path, coefficient=DEVIATION_COEFFICIENT, angle=DEVIATION_ANGLE):
+        """Open a model file meshed for display. A warm open skips both import and meshing."""
+        key = self.key(fingerprint_file(path), coefficient, angle)
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+        return self._mesh_and_store(key, load_shape(path), coefficient, angle), False
+
+    def _mesh_and_store(self, key, shape, coefficient, angle):
+        BRepMesh_IncrementalMesh(shape, display_deflection(shape, coefficient), False, angle, True)
+        self.put(key, shape)
+        return shape
@@ -0,0 +1,181 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from geometry_jobs import DEVIATION_COEFFICIENT, display_deflection
+from mesh_arrays import shape_mesh_arrays
+from polylines import chain_polylines
+from slicer import section_at, section_polylines, slice_heights
+
+# Planes per vectorized batch: bounds the (triangle, plane) pairs held at once
+BATCH = 256
+
+
+def triangulate(shape, coefficient=DEVIATION_COEFFICIENT):
+    """(vertices, triangles) of the shape's display mesh, float64 and welded across faces.
+
+    Merging the boundary nodes that faces each have their own copy of makes
+    triangle edges on both sides of a face boundary the same edge.
+    """
+    mesh = shape_mesh_arrays(shape, coefficient, dtype=np.float64, weld_mode="shape")
+    return mesh.vertices, mesh.triangles
+
+
+def avoid_vertices(heights, z, tolerance):
+    """Move planes that would pass exactly through a vertex by 2 * tolerance."""
+    levels = np.unique(z)
+    heights = np.asarray(heights, dtype=float)
+    if len(levels) < 2:
+        return heights
+    i = np.clip(np.searchsorted(levels, heights), 1, len(levels) - 1)
+    nearest = np.minimum(np.abs(heights - levels[i - 1]), np.abs(heights - levels[i]))
+    return np.where(nearest < tolerance, heights + 2.0 * tolerance, heights)
+
+
+def slice_mesh(vertices, triangles, heights):
+    """Intersect every triangle with every horizontal plane it spans.
+
+    Returns (layer, points, keys): for each segment its layer index, its two
+    end points (K, 2, 3) and the mesh edges they lie on (K, 2), an edge key
+    being shared by the two triangles of that edge. No plane may contain a
+    vertex (see avoid_vertices).
+    """
+    z = vertices[:, 2]
+    tz = z[triangles]
+    order = np.argsort(heights)
+    sorted_heights = heights[order]
+    # Planes strictly between the lowest and highest corner of each triangle
+    first = np.searchsorted(sorted_heights, tz.min(axis=1), "right")
+    last = np.searchsorted(sorted_heights, tz.max(axis=1), "left")
+    layers, points, keys = [], [], []
+    for lo in range(0, len(heights), BATCH):
+        hi = min(lo + BATCH, len(heights))
+        counts = np.clip(np.minimum(last, hi) - np.maximum(first, lo), 0, None)
+        if not counts.any():
+            continue
+        tri = np.repeat(np.arange(len(triangles)), counts)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        plane = np.maximum(first, lo)[tri] + np.arange(len(tri)) - starts
+        h = sorted_heights[plane][:, None]
+
+        a = triangles[tri]
+        b = np.roll(a, -1, axis=1)  # edges a0-a1, a1-a2, a2-a0
+        above = z[a] > h
+        crosses = above != np.roll(above, -1, axis=1)  # exactly two per triangle
+        za, zb = z[a], z[b]
+        t = (h - za) / np.where(crosses, zb - za, 1.0)
+        edge_points = vertices[a] + t[..., None] * (vertices[b] - vertices[a])
+        edge_keys = np.minimum(a, b).astype(np.int64) * len(vertices) + np.maximum(a, b)
+
+        pick = np.argsort(~crosses, axis=1, kind="stable")[:, :2]
+        layers.append(order[plane])
+        points.append(np.take_along_axis(edge_points, pick[..., None], axis=1))
+        keys.append(np.take_along_axis(edge_keys, pick, axis=1))
+    if not layers:
+        return np.empty(0, dtype=np.int64), np.empty((0, 2, 3)), np.empty((0, 2), dtype=np.int64)
+    return np.concatenate(layers), np.concatenate(points), np.concatenate(keys)
+
+
+class SliceLayers:
+    """Segments of all layers grouped by layer; polylines are chained on demand."""
+
+    def __init__(self, heights, layer, points, keys):
+        self.heights = heights
+        order = np.argsort(layer, kind="stable")
+        self._points = points[order]
+        self._keys = keys[order]
+        self._offsets = np.searchsorted(layer[order], np.arange(len(heights) + 1))
+        self._polylines = {}
+
+    def __len__(self):
+        return len(self.heights)
+
+    def segments(self, index):
+        """(n, 2, 3) array of the unordered segments of one layer."""
+        return self._points[self._offsets[index]:self._offsets[index + 1]]
+
+    def polylines(self, index):
+        """Polylines of one layer as (points, closed), points an (n, 3) array."""
+        if index not in self._polylines:
+            lo, hi = self._offsets[index], self._offsets[index + 1]
+            keys = self._keys[lo:hi]
+            nodes, node_index = np.unique(keys.ravel(), return_inverse=True)
+            node_points = np.empty((len(nodes), 3))
+            node_points[node_index] = self._points[lo:hi].reshape(-1, 3)
+            node_index = node_index.reshape(-1, 2)
+            self._polylines[index] = chain_polylines(node_index[:, 0], node_index[:, 1], node_points)
+        return self._polylines[index]
+
+
+class MeshSlicer:
+    """Preview slicing on the display mesh, exact sections for chosen layers.
+
+    The shape is triangulated once. Any number of horizontal planes is then
+    intersected with all triangles in a few vectorized passes, which is
+    orders of magnitude faster than one BRepAlgoAPI_Section per plane and
+    accurate to the mesh deflection. refine() computes the exact section of
+    a layer when a preview is not good enough.
+    """
+
+    def __init__(self, shape, coefficient=DEVIATION_COEFFICIENT):
+        self.shape = shape
+        self.vertices, self.triangles = triangulate(shape, coefficient)
+        self.tolerance = display_deflection(shape, coefficient) * 1e-3
+
+    def z_range(self):
+        z = self.vertices[:, 2]
+        return float(z.min()), float(z.max())
+
+    def slice(self, heights):
+        heights = avoid_vertices(heights, self.vertices[:, 2], self.tolerance)
+        return SliceLayers(heights, *slice_mesh(self.vertices, self.triangles, heights))
+
+    def slice_count(self, count):
+        return self.slice(slice_heights(*self.z_range(), count))
+
+    def refine(self, z, deflection=None):
+        """Exact section at height z as polylines (points, closed)."""
+        section = section_at(self.shape, z)
+        if section is None:
+            return []
+        return section_polylines(section, deflection or self.tolerance * 1e3, self.tolerance * 10)
+
+
+def main(argv=None):
+    from model_io import load_shape
+    parser = argparse.ArgumentParser(description="Mesh-based slice preview, with exact refinement of chosen layers.")
+    parser.add_argument("model")
+    parser.add_argument("--slices", type=int, default=2000)
+    parser.add_argument("--refine", type=int, nargs="*", default=[], help="layer indices to recompute exactly")
+    parser.add_argument("--compare", type=int, metavar="N", help="also time N exact sections")
+    args = parser.parse_args(argv)
+
+    shape = load_shape(args.model)
+    start = time.perf_counter()
+    slicer = MeshSlicer(shape)
+    t_mesh = time.perf_counter() - start
+    start = time.perf_counter()
+    layers = slicer.slice_count(args.slices)
+    t_slice = time.perf_counter() - start
+    start = time.perf_counter()
+    loops = sum(len(layers.polylines(i)) for i in range(len(layers)))
+    t_chain = time.perf_counter() - start
+    print(f"{len(slicer.triangles)} triangles meshed in {t_mesh * 1000:.0f} ms")
+    print(f"{len(layers)} layers sliced in {t_slice * 1000:.0f} ms, {loops} polylines chained in {t_chain * 1000:.0f} ms")
+    for index in args.refine:
+        exact = slicer.refine(layers.heights[index])
+        print(f"layer {index}: {len(layers.polylines(index))} preview polylines, {len(exact)} exact")
+    if args.compare:
+        heights = layers.heights[:: max(1, len(layers) // args.compare)][:args.compare]
+        start = time.perf_counter()
+        for z in heights:
+            section_at(shape, z)
+        per_layer = (time.perf_counter() - start) / len(heights)
+        print(f"exact section: {per_layer * 1000:.1f} ms per layer, {per_layer * len(layers):.1f} s for all layers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import os
+
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepTools import breptools
+from OCC.Core.TopAbs import TopAbs_SOLID
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopoDS import TopoDS_Shape
+from OCC.Extend.DataExchange import read_iges_file, read_step_file, read_stl_file
+
+from tracing import span
+
+MODEL_FILTER = "CAD models (*.step *.stp *.iges *.igs *.brep *.brp *.stl)"
+
+
+def read_brep_file(path):
+    shape = TopoDS_Shape()
+    if not breptools.Read(shape, path, BRep_Builder()):
+        raise IOError(f"could not read BRep file {path}")
+    return shape
+
+
+_READERS = {
+    ".step": read_step_file,
+    ".stp": read_step_file,
+    ".iges": read_iges_file,
+    ".igs": read_iges_file,
+    ".brep": read_brep_file,
+    ".brp": read_brep_file,
+    ".stl": read_stl_file,
+}
+
+
+def load_shape(path):
+    """Read a CAD file into a single TopoDS_Shape, picking the reader from the extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in _READERS:
+        raise ValueError(f"unsupported file type: {ext}")
+    with span("load_shape", path=os.path.basename(path)):
+        return _READERS[ext](path)
+
+
+def iter_parts(shape):
+    """Yield the solids of shape, or shape itself when it has none (shells, meshes...)."""
+    explorer = TopExp_Explorer(shape, TopAbs_SOLID)
+    if not explorer.More():
+        yield shape
+        return
+    while explorer.More():
+        yield explorer.Current()
+        explorer.Next()
@@ -0,0 +1,96 @@
+from feature_tree import BoxFeature, ExtrudeFeature, FaceRef, FeatureTree, face_normal, recompute_job
+from geometry_jobs import NullProgress
+from local_features import LocalExtrudeFeature
+from topology_index import TopologyIndex
+
+
+class PartSession:
+    """The modelling state behind CADApp, without any widget.
+
+    Holds the feature tree, the displayed shape with its topology index
+    and the selected face ID. Edits add or change features and return a
+    rollback callable; the rebuild itself is left to the caller (job
+    executor in the GUI, rebuild() when headless).
+    """
+
+    def __init__(self):
+        self.tree = FeatureTree()
+        self.shape = None
+        self.topology = None
+        self.selected_face_id = None
+        self.history = None
+
+    @property
+    def selected_face(self):
+        if self.selected_face_id is None:
+            return None
+        return self.topology.face(self.selected_face_id)
+
+    def new_box(self, dx=60.0, dy=60.0, dz=60.0):
+        self.tree.set_tip(self.tree.add(BoxFeature(dx, dy, dz)))
+        shape, _ = self.tree.recompute()
+        self._set_shape(shape)
+        return shape
+
+    def select_face_id(self, face_id):
+        if face_id is not None:
+            self.topology.face(face_id)  # raises IndexError for a stale id
+        self.selected_face_id = face_id
+
+    def selection_ids(self, sub_shapes):
+        """(kind, id) pairs of picked sub-shapes of the part, in constant time each."""
+        return self.topology.ids(sub_shapes)
+
+    def extrusions(self):
+        return self.tree.of_kind("extrude", "local_extrude")
+
+    def add_extrusion(self, distance, local=True):
+        """Add an extrusion of the selected face; raises ValueError when it cannot be done."""
+        if self.selected_face_id is None:
+            raise ValueError("Please select a face to extrude.")
+        face_normal(self.selected_face)
+        if local and distance == 0:
+            raise ValueError("Extrusion distance must not be zero.")
+        # The previous tip stays cached in the tree
+        previous_tip = self.tree.tip
+        face_ref = self.tree.add(FaceRef(previous_tip, self.selected_face_id))
+        if local:
+            feature = LocalExtrudeFeature(previous_tip, face_ref, distance)
+        else:
+            feature = ExtrudeFeature(face_ref, distance)
+        self.tree.set_tip(self.tree.add(feature))
+
+        def rollback():
+            self.tree.remove(face_ref)
+            self.tree.set_tip(previous_tip)
+        return rollback
+
+    def edit_extrusion(self, feature_id, distance):
+        """Change an extrusion distance; only it and its dependents get rebuilt."""
+        old = self.tree.set_param(feature_id, "distance", distance)
+        return lambda: self.tree.set_param(feature_id, "distance", old)
+
+    def apply(self, shape):
+        """Take a rebuilt tip shape; returns the FaceHistory usable for display, if any."""
+        self.history = None
+        tip = self.tree.features[self.tree.tip]
+        if getattr(tip, "history", None) is not None and self.tree.shape(tip.inputs[0]).IsSame(self.shape):
+            self.history = tip.history
+        self._set_shape(shape)
+        return self.history
+
+    def rebuild(self, rollback=None):
+        """Synchronous rebuild, rolling the edit back if it fails."""
+        try:
+            shape, rebuilt = recompute_job(NullProgress(), self.tree)
+        except Exception:
+            if rollback is not None:
+                rollback()
+            raise
+        self.apply(shape)
+        return rebuilt
+
+    def _set_shape(self, shape):
+        self.shape = shape
+        self.topology = TopologyIndex(shape)
+        self.selected_face_id = None
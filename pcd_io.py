@@ -0,0 +1,281 @@
+import argparse
+import collections
+import itertools
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from OCC.Core.AIS import AIS_PointCloud
+from OCC.Core.Graphic3d import Graphic3d_ArrayOfPoints
+
+try:
+    import lzf
+except ImportError:
+    lzf = None
+
+# PCD TYPE letter to NumPy kind; the byte size comes from SIZE
+_KINDS = {"F": "f", "I": "i", "U": "u"}
+_DATA = ("ascii", "binary", "binary_compressed")
+# Points per chunk when streaming a cloud
+CHUNK = 1 << 20
+
+
+class PcdHeader:
+    """Header of a PCD file, and the byte offset of its data."""
+
+    def __init__(self, fields, sizes, types, counts, width, height, points, data, offset, viewpoint=None):
+        self.fields = fields
+        self.sizes = sizes
+        self.types = types
+        self.counts = counts
+        self.width = width
+        self.height = height
+        self.points = points
+        self.data = data
+        self.offset = offset
+        self.viewpoint = viewpoint
+
+    def dtype(self):
+        """Structured dtype of one point; "_" padding fields get unique names."""
+        names, padding = [], 0
+        for name in self.fields:
+            if name == "_":
+                name, padding = f"_{padding}", padding + 1
+            names.append(name)
+        return np.dtype([
+            (name, f"<{_KINDS[kind]}{size}", (count,) if count > 1 else ())
+            for name, size, kind, count in zip(names, self.sizes, self.types, self.counts)
+        ])
+
+
+def read_pcd_header(f):
+    """Parse the header from the start of a binary file object, leaving it at the data."""
+    values = {}
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("PCD header without a DATA line")
+        words = line.decode("ascii", errors="replace").split()
+        if not words or words[0].startswith("#"):
+            continue
+        key, args = words[0].upper(), words[1:]
+        values[key] = args
+        if key == "DATA":
+            break
+    fields = values.get("FIELDS") or values.get("COLUMNS")
+    if not fields:
+        raise ValueError("PCD header without FIELDS")
+    counts = [int(c) for c in values.get("COUNT", ["1"] * len(fields))]
+    sizes = [int(s) for s in values.get("SIZE", ["4"] * len(fields))]
+    types = [t.upper() for t in values.get("TYPE", ["F"] * len(fields))]
+    if not len(fields) == len(counts) == len(sizes) == len(types):
+        raise ValueError("PCD FIELDS, SIZE, TYPE and COUNT lengths differ")
+    width = int(values.get("WIDTH", ["0"])[0])
+    height = int(values.get("HEIGHT", ["1"])[0])
+    points = int(values["POINTS"][0]) if "POINTS" in values else width * height
+    data = values["DATA"][0].lower() if values["DATA"] else ""
+    if data not in _DATA:
+        raise ValueError(f"unsupported PCD DATA encoding {data!r}")
+    viewpoint = [float(v) for v in values["VIEWPOINT"]] if "VIEWPOINT" in values else None
+    return PcdHeader(fields, sizes, types, counts, width, height, points, data, f.tell(), viewpoint)
+
+
+def slow_lzf(header):
+    """True when the data of header goes through the pure Python LZF decoder."""
+    return header.data == "binary_compressed" and lzf is None
+
+
+def lzf_decompress(data, size):
+    """liblzf decompression, pure Python (and slow) when the lzf module is not installed."""
+    if lzf is not None:
+        return lzf.decompress(data, size)
+    out = bytearray(size)
+    i = o = 0
+    while i < len(data):
+        ctrl = data[i]
+        i += 1
+        if ctrl < 32:
+            # Literal run of ctrl + 1 bytes
+            out[o:o + ctrl + 1] = data[i:i + ctrl + 1]
+            i += ctrl + 1
+            o += ctrl + 1
+            continue
+        # Back reference: length in the top 3 bits (7: one more byte), offset in 13
+        length = ctrl >> 5
+        if length == 7:
+            length += data[i]
+            i += 1
+        ref = o - ((ctrl & 0x1F) << 8) - data[i] - 1
+        i += 1
+        length += 2
+        if ref < 0:
+            raise ValueError("corrupt LZF data")
+        if ref + length <= o:
+            out[o:o + length] = out[ref:ref + length]
+        else:
+            # Overlapping copy repeats the last bytes
+            for k in range(length):
+                out[o + k] = out[ref + k]
+        o += length
+    if o != size:
+        raise ValueError(f"LZF data decompressed to {o} bytes, {size} expected")
+    return bytes(out)
+
+
+def _read_ascii(f, header, dtype, rows=None):
+    # islice hands loadtxt exactly the rows wanted and leaves f after them
+    rows = header.points if rows is None else rows
+    columns = np.loadtxt(itertools.islice(f, rows), dtype=np.float64, ndmin=2)
+    cloud = np.empty(len(columns), dtype=dtype)
+    column = 0
+    for name, count in zip(dtype.names, header.counts):
+        values = columns[:, column:column + count]
+        cloud[name] = values if count > 1 else values[:, 0]
+        column += count
+    return cloud
+
+
+def _read_compressed(f, header, dtype):
+    compressed_size, size = struct.unpack("<II", f.read(8))
+    buffer = lzf_decompress(f.read(compressed_size), size)
+    # Fields are stored one after the other, each for all points
+    cloud = np.empty(header.points, dtype=dtype)
+    offset = 0
+    for name in dtype.names:
+        field = dtype.fields[name][0]
+        count = field.shape[0] if field.shape else 1
+        values = np.frombuffer(buffer, dtype=field.base, count=header.points * count, offset=offset)
+        cloud[name] = values.reshape(cloud[name].shape)
+        offset += values.nbytes
+    return cloud
+
+
+def read_pcd(path):
+    """(header, points) of a PCD file, points a structured array with one field per PCD field."""
+    with open(path, "rb") as f:
+        header = read_pcd_header(f)
+        dtype = header.dtype()
+        if header.data == "ascii":
+            cloud = _read_ascii(f, header, dtype)
+        elif header.data == "binary":
+            cloud = np.fromfile(path, dtype=dtype, count=header.points, offset=header.offset)
+        else:
+            cloud = _read_compressed(f, header, dtype)
+    if len(cloud) != header.points:
+        raise ValueError(f"{path}: {len(cloud)} points read, {header.points} declared")
+    return header, cloud
+
+
+def iter_pcd_chunks(path, chunk=CHUNK):
+    """Yield (positions, colors) of at most chunk points, as positions and colors return them.
+
+    Binary files are memory-mapped and ascii ones parsed chunk by chunk, so
+    only one chunk is in memory at a time. binary_compressed files are one
+    LZF block stored field by field and have to be decompressed whole.
+    """
+    with open(path, "rb") as f:
+        header = read_pcd_header(f)
+        if header.points == 0:
+            return
+        if header.data == "ascii":
+            dtype = header.dtype()
+            for start in range(0, header.points, chunk):
+                part = _read_ascii(f, header, dtype, min(chunk, header.points - start))
+                if not len(part):
+                    return
+                yield positions(part), colors(part)
+            return
+    if header.data == "binary":
+        cloud = np.memmap(path, dtype=header.dtype(), mode="r", offset=header.offset, shape=(header.points,))
+    else:
+        _, cloud = read_pcd(path)
+    for start in range(0, len(cloud), chunk):
+        part = cloud[start:start + chunk]
+        yield positions(part), colors(part)
+
+
+def positions(cloud, finite=True):
+    """(n, 3) float64 positions; points with NaN coordinates (holes of organized clouds) dropped."""
+    xyz = np.column_stack([cloud["x"], cloud["y"], cloud["z"]]).astype(np.float64)
+    return xyz[np.isfinite(xyz).all(axis=1)] if finite else xyz
+
+
+def colors(cloud, finite=True):
+    """(n, 3) uint8 colors from a packed rgb or rgba field, or None."""
+    name = next((n for n in ("rgb", "rgba") if n in cloud.dtype.names), None)
+    if name is None:
+        return None
+    packed = np.ascontiguousarray(cloud[name])
+    packed = packed.view(np.uint32) if packed.itemsize == 4 else packed.astype(np.uint32)
+    rgb = np.column_stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF]).astype(np.uint8)
+    if finite:
+        rgb = rgb[np.isfinite(positions(cloud, finite=False)).all(axis=1)]
+    return rgb
+
+
+def _consume(iterator):
+    collections.deque(iterator, maxlen=0)
+
+
+def point_array(xyz, rgb=None):
+    """A Graphic3d_ArrayOfPoints filled from (n, 3) positions and optional uint8 colors.
+
+    pythonocc gives no buffer access to the vertex array, so this is not a
+    bulk copy: it still makes one AddVertex call, plus one SetVertexColor
+    call for colored clouds, per point. map over plain float lists only
+    saves the gp_Pnt and Quantity_Color objects and the Python loop; for
+    multi-million point scans this fill, not the parse, is the slow step.
+    """
+    array = Graphic3d_ArrayOfPoints(len(xyz), rgb is not None)
+    x, y, z = np.asarray(xyz, dtype=np.float64).T.tolist()
+    _consume(map(array.AddVertex, x, y, z))
+    if rgb is not None:
+        r, g, b = (np.asarray(rgb, dtype=np.float64).T / 255.0).tolist()
+        _consume(map(array.SetVertexColor, range(1, len(xyz) + 1), r, g, b))
+    return array
+
+
+def point_cloud(path):
+    """An AIS_PointCloud of a PCD file, colored when it has an rgb field."""
+    _, cloud = read_pcd(path)
+    presentation = AIS_PointCloud()
+    presentation.SetPoints(point_array(positions(cloud), colors(cloud)))
+    return presentation
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read a PCD point cloud and report the time per stage.")
+    parser.add_argument("cloud")
+    parser.add_argument("--show", action="store_true")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    header, cloud = read_pcd(args.cloud)
+    if slow_lzf(header):
+        print("lzf module not installed: decompressed with the pure Python decoder", file=sys.stderr)
+    t_read = time.perf_counter() - start
+    start = time.perf_counter()
+    xyz, rgb = positions(cloud), colors(cloud)
+    array = point_array(xyz, rgb)
+    t_fill = time.perf_counter() - start
+    print(
+        f"{os.path.basename(args.cloud)}: {header.points} points ({header.data}, fields {' '.join(header.fields)}), "
+        f"{len(xyz)} finite, read in {t_read * 1000:.0f} ms, array filled in {t_fill * 1000:.0f} ms (one call per point)"
+    )
+    if args.show:
+        from OCC.Display.SimpleGui import init_display
+        display, start_display, _, _ = init_display()
+        presentation = AIS_PointCloud()
+        presentation.SetPoints(array)
+        display.Context.Display(presentation, True)
+        display.View_Iso()
+        display.FitAll()
+        start_display()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
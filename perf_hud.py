@@ -0,0 +1,168 @@
+import json
+import re
+import time
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtWidgets import QWidget
+
+from OCC.Core.AIS import AIS_ListOfInteractive
+from OCC.Core.Graphic3d import Graphic3d_RenderingParams
+from OCC.Core.TColStd import TColStd_IndexedDataMapOfStringString
+
+from perf_stats import FrameClock, process_memory_bytes, summarize
+
+
+def _text(value):
+    return value if isinstance(value, str) else value.ToCString()
+
+
+_NUMBER = re.compile(r"(\d[\d ,]*(?:\.\d+)?)\s*([KMG]iB)?", re.IGNORECASE)
+_UNITS = {"kib": 2 ** 10, "mib": 2 ** 20, "gib": 2 ** 30}
+
+
+def _number(text):
+    # "12 345" -> 12345.0, "1.5 MiB" -> 1572864.0, None when not numeric
+    match = _NUMBER.search(text)
+    if match is None:
+        return None
+    value = float(match.group(1).replace(" ", "").replace(",", ""))
+    unit = match.group(2)
+    return value * _UNITS[unit.lower()] if unit else value
+
+
+class PerfCounters:
+    """Rendering counters of a viewer, from OCCT frame statistics and our own frame clock.
+
+    OCCT only collects its statistics, which cost time on every redraw,
+    between enable_occt_stats(True) and enable_occt_stats(False).
+    """
+
+    def __init__(self, display, frames=None):
+        self.display = display
+        self.frames = frames if frames is not None else FrameClock()
+
+    def enable_occt_stats(self, enabled=True, interval=0.5):
+        params = self.display.View.ChangeRenderingParams()
+        if enabled:
+            params.CollectedStats = Graphic3d_RenderingParams.PerfCounters_All
+            params.StatsUpdateInterval = interval
+        else:
+            params.CollectedStats = Graphic3d_RenderingParams.PerfCounters_NONE
+
+    def occt_stats(self):
+        stats = TColStd_IndexedDataMapOfStringString()
+        self.display.View.StatisticInformation(stats)
+        return {_text(stats.FindKey(i)): _text(stats.FindFromIndex(i)) for i in range(1, stats.Size() + 1)}
+
+    def object_count(self):
+        objects = AIS_ListOfInteractive()
+        self.display.Context.DisplayedObjects(objects)
+        return objects.Size()
+
+    def snapshot(self):
+        occt = self.occt_stats()
+
+        def find(*words):
+            for key, value in occt.items():
+                lowered = key.lower()
+                if all(w in lowered for w in words):
+                    return _number(value)
+            return None
+
+        # OCCT counts every redraw of the view, including the ones the
+        # loader and LOD trigger; the frame clock only sees Qt paint and
+        # mouse-move events
+        fps = next((_number(v) for k, v in occt.items() if k.strip().lower() == "fps"), None)
+        return {
+            "time": time.time(),
+            "fps": fps,
+            "event_fps": self.frames.fps(),
+            "frame_ms": summarize(self.frames.durations()),
+            "frame_histogram": dict(zip(FrameClock.bucket_labels(), self.frames.histogram())),
+            "objects": self.object_count(),
+            "triangles": find("triangles"),
+            "lines": find("lines"),
+            "points": find("points"),
+            "gpu_memory_bytes": find("gpu", "memory"),
+            "geometry_memory_bytes": find("geometry"),
+            "cpu_memory_bytes": process_memory_bytes(),
+            "occt": occt,
+        }
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+class PerfHud(QWidget):
+    """Overlay in the corner of the 3D canvas with the live counters."""
+
+    def __init__(self, canvas, counters, parent=None):
+        super().__init__(parent or canvas.parentWidget())
+        self.setAttribute(Qt.WA_NativeWindow)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.canvas = canvas
+        self.counters = counters
+        self._snapshot = None
+        self.resize(260, 208)
+        self._timer = QTimer(self)
+        self._timer.setInterval(500)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        self.set_visible(not self.isVisible())
+
+    def set_visible(self, visible):
+        self.counters.enable_occt_stats(visible)
+        if visible:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self.hide()
+
+    def refresh(self):
+        self._snapshot = self.counters.snapshot()
+        origin = self.canvas.geometry().topLeft()
+        self.move(origin.x() + 8, origin.y() + 8)
+        self.update()
+
+    def paintEvent(self, event):
+        s = self._snapshot
+        if s is None:
+            return
+        p = QPainter(self)
+        p.fillRect(self.rect(), QColor(21, 23, 28, 220))
+        p.setPen(QColor("#f0f0f0"))
+
+        def fmt(value, scale=1.0, unit=""):
+            return "n/a" if value is None else f"{value / scale:,.1f}{unit}"
+
+        fps = s["fps"] if s["fps"] is not None else s["event_fps"]
+        lines = [
+            f"FPS {fps:.0f}   p95 {s['frame_ms']['p95_ms']:.1f} ms",
+            f"objects {s['objects']:,}",
+            f"triangles {fmt(s['triangles'])}",
+            f"edge segments {fmt(s['lines'])}",
+            f"GPU memory {fmt(s['gpu_memory_bytes'], 2 ** 20, ' MiB')}",
+            f"geometry {fmt(s['geometry_memory_bytes'], 2 ** 20, ' MiB')}",
+            f"CPU memory {fmt(s['cpu_memory_bytes'], 2 ** 20, ' MiB')}",
+        ]
+        y = 18
+        for line in lines:
+            p.drawText(8, y, line)
+            y += 18
+        # Frame-time histogram, one bar per bucket
+        counts = list(s["frame_histogram"].values())
+        top = max(counts) or 1
+        bar_w = (self.width() - 16) // len(counts)
+        base = self.height() - 8
+        colors = ("#98c379", "#98c379", "#e5c07b", "#d19a66", "#e06c75", "#e06c75")
+        for i, count in enumerate(counts):
+            h = int((base - y) * count / top)
+            p.fillRect(8 + i * bar_w, base - h, bar_w - 2, h, QColor(colors[i]))
+        p.end()
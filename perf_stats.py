@@ -0,0 +1,81 @@
+import math
+import os
+import sys
+import time
+from collections import deque
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted sequence, q in [0, 100]."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(seconds):
+    """p50/p95/max/mean in milliseconds for a list of durations in seconds."""
+    values = sorted(seconds)
+    if not values:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0, "mean_ms": 0.0}
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50) * 1000.0,
+        "p95_ms": percentile(values, 95) * 1000.0,
+        "max_ms": values[-1] * 1000.0,
+        "mean_ms": sum(values) / len(values) * 1000.0,
+    }
+
+
+def process_memory_bytes():
+    """Resident memory of this process; the peak where the current value is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_memory_bytes()
+
+
+def peak_memory_bytes():
+    """Peak resident memory of this process, or None where getrusage is missing."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class FrameClock:
+    """Durations of the last frames rendered by a viewer."""
+
+    # Upper bounds of the histogram buckets in milliseconds
+    BUCKETS = (4.0, 8.0, 16.7, 33.3, 66.7, float("inf"))
+
+    def __init__(self, size=600):
+        self._frames = deque(maxlen=size)
+
+    def add(self, seconds):
+        self._frames.append((time.perf_counter(), seconds))
+
+    def fps(self, window=1.0):
+        now = time.perf_counter()
+        return float(sum(1 for t, _ in self._frames if now - t <= window)) / window
+
+    def durations(self):
+        return [d for _, d in self._frames]
+
+    @classmethod
+    def bucket_labels(cls):
+        return [f"<={b:g}ms" if math.isfinite(b) else f">{cls.BUCKETS[i - 1]:g}ms" for i, b in enumerate(cls.BUCKETS)]
+
+    def histogram(self):
+        counts = [0] * len(self.BUCKETS)
+        for _, seconds in self._frames:
+            ms = seconds * 1000.0
+            for i, bound in enumerate(self.BUCKETS):
+                if ms <= bound:
+                    counts[i] += 1
+                    break
+        return counts
@@ -0,0 +1,479 @@
+import argparse
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from PyQt5.QtCore import QEvent, QObject, QTimer
+
+from OCC.Core.AIS import AIS_PointCloud
+from OCC.Core.gp import gp_Pnt
+
+from geometry_jobs import NullProgress
+from pcd_io import iter_pcd_chunks, point_array, read_pcd_header, slow_lzf
+from stall_watchdog import operation
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "cad-python", "octrees")
+CLOUD_FILTER = "Point clouds (*.pcd)"
+FORMAT_VERSION = 1
+METADATA = "octree.json"
+# One stored point: position and color (white for clouds without colors)
+POINT = np.dtype([("xyz", "<f4", (3,)), ("rgb", "u1", (3,))])
+# Points kept in a node; the rest of its cube goes down to its children
+NODE_POINTS = 20000
+# Node sets up to this size are split in memory, larger ones streamed from disk
+BUCKET_POINTS = 4_000_000
+MAX_DEPTH = 20
+# Points on screen at most, and node loads in flight
+POINT_BUDGET = 3_000_000
+MAX_LOADS = 8
+# Nodes whose cube projects smaller than this are not refined further
+MIN_NODE_PIXELS = 80.0
+_CHUNK = 1 << 20
+
+log = logging.getLogger("cad.pointcloud")
+
+
+def node_cube(name, origin, size):
+    """(origin, size) of a node's cube. Names are "r" and one octant digit per level."""
+    origin = np.array(origin, dtype=np.float64)
+    for digit in name[1:]:
+        size /= 2
+        i = int(digit)
+        origin = origin + size * np.array([(i >> 2) & 1, (i >> 1) & 1, i & 1])
+    return origin, size
+
+
+def octant(xyz, origin, size):
+    """Child octant of each point: bit 2 for x, bit 1 for y, bit 0 for z in the upper half."""
+    half = origin + size / 2
+    return (xyz[:, 0] >= half[0]) * 4 + (xyz[:, 1] >= half[1]) * 2 + (xyz[:, 2] >= half[2])
+
+
+def to_records(xyz, rgb):
+    records = np.empty(len(xyz), dtype=POINT)
+    records["xyz"] = xyz
+    records["rgb"] = rgb if rgb is not None else 255
+    return records
+
+
+def _file_chunks(path, chunk=_CHUNK):
+    data = np.memmap(path, dtype=POINT, mode="r")
+    for start in range(0, len(data), chunk):
+        yield np.array(data[start:start + chunk])
+
+
+class OctreeBuilder:
+    """Out-of-core octree construction.
+
+    A node keeps a random sample of node_points of the points in its cube
+    and hands the rest down to its eight children, so each level is a
+    uniform subsample of the cloud, denser with depth, and no point is
+    stored twice. Node sets larger than bucket_points are split by
+    streaming them into eight child files; smaller ones are shuffled once
+    and split in memory. All node points end up in one points.bin.
+    """
+
+    def __init__(self, directory, origin, size, node_points=NODE_POINTS, bucket_points=BUCKET_POINTS, progress=None):
+        self.origin = origin
+        self.size = size
+        self.node_points = node_points
+        self.bucket_points = bucket_points
+        self.progress = progress or NullProgress()
+        self.nodes = {}
+        self._rng = np.random.default_rng(0)
+        self._staging = tempfile.mkdtemp(prefix="staging-", dir=directory)
+        self._points = open(os.path.join(directory, "points.bin"), "wb")
+        self._offset = 0
+        self._total = 0
+
+    def build(self, chunks, count):
+        """Build from an iterable of POINT record arrays; returns {name: [offset, count]}."""
+        self._total = count
+        try:
+            self._process("r", chunks, count)
+        finally:
+            self._points.close()
+            shutil.rmtree(self._staging, ignore_errors=True)
+        return self.nodes
+
+    def _emit(self, name, records):
+        records.tofile(self._points)
+        self.nodes[name] = [self._offset, len(records)]
+        self._offset += len(records)
+        self.progress.report(self._offset / max(self._total, 1), "octree")
+
+    def _process(self, name, chunks, count):
+        if count <= self.bucket_points or len(name) > MAX_DEPTH:
+            records = np.concatenate(list(chunks))
+            self._split_memory(name, records[self._rng.permutation(len(records))])
+        else:
+            self._split_stream(name, chunks, count)
+
+    def _split_stream(self, name, chunks, count):
+        origin, size = node_cube(name, self.origin, self.size)
+        keep = self.node_points / count
+        paths = [os.path.join(self._staging, f"{name}{i}.bin") for i in range(8)]
+        counts = np.zeros(8, dtype=np.int64)
+        sample = []
+        for records in chunks:
+            self.progress.check()
+            mask = self._rng.random(len(records)) < keep
+            sample.append(records[mask])
+            rest = records[~mask]
+            octants = octant(rest["xyz"], origin, size)
+            order = np.argsort(octants, kind="stable")
+            rest = rest[order]
+            bounds = np.searchsorted(octants[order], np.arange(9))
+            for i in range(8):
+                if bounds[i + 1] > bounds[i]:
+                    with open(paths[i], "ab") as f:
+                        rest[bounds[i]:bounds[i + 1]].tofile(f)
+                    counts[i] += bounds[i + 1] - bounds[i]
+        self._emit(name, np.concatenate(sample))
+        for i in range(8):
+            if counts[i]:
+                self._process(f"{name}{i}", _file_chunks(paths[i]), int(counts[i]))
+                os.remove(paths[i])
+
+    def _split_memory(self, name, records):
+        # records are shuffled: the first node_points are a random sample,
+        # and the stable split below keeps every child's points shuffled
+        stack = [(name, records)]
+        while stack:
+            self.progress.check()
+            name, records = stack.pop()
+            if len(records) <= self.node_points or len(name) > MAX_DEPTH:
+                self._emit(name, records)
+                continue
+            self._emit(name, records[:self.node_points])
+            rest = records[self.node_points:]
+            origin, size = node_cube(name, self.origin, self.size)
+            octants = octant(rest["xyz"], origin, size)
+            order = np.argsort(octants, kind="stable")
+            rest = rest[order]
+            bounds = np.searchsorted(octants[order], np.arange(9))
+            for i in range(8):
+                if bounds[i + 1] > bounds[i]:
+                    stack.append((f"{name}{i}", rest[bounds[i]:bounds[i + 1]]))
+
+
+class Octree:
+    """An octree written by build_octree; node points are read from disk on demand."""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, METADATA)) as f:
+            metadata = json.load(f)
+        if metadata.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported octree version {metadata.get('version')}")
+        self.directory = directory
+        self.points = metadata["points"]
+        self.colors = metadata["colors"]
+        self.origin = np.array(metadata["origin"])
+        self.size = metadata["size"]
+        self.nodes = {name: tuple(entry) for name, entry in metadata["nodes"].items()}
+        self._data = np.memmap(os.path.join(directory, "points.bin"), dtype=POINT, mode="r")
+
+    def depth(self):
+        return max(len(name) for name in self.nodes) - 1
+
+    def count(self, name):
+        return self.nodes[name][1]
+
+    def children(self, name):
+        return [child for child in (f"{name}{i}" for i in range(8)) if child in self.nodes]
+
+    def cube(self, name):
+        return node_cube(name, self.origin, self.size)
+
+    def read(self, name):
+        offset, count = self.nodes[name]
+        return np.array(self._data[offset:offset + count])
+
+
+def build_octree(progress, source, directory, node_points=NODE_POINTS, bucket_points=BUCKET_POINTS):
+    """GeometryJobExecutor job: build the octree of a PCD file into directory and open it.
+
+    The cloud is read once, into a record file next to the octree while its
+    bounds are collected, and split from there. The octree is built next to
+    directory and moved in place once complete.
+    """
+    partial = directory + ".partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    staged = os.path.join(partial, "input.bin")
+    lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+    count, colors = 0, False
+    with open(staged, "wb") as f:
+        for xyz, rgb in iter_pcd_chunks(source):
+            progress.check()
+            if len(xyz):
+                lo = np.minimum(lo, xyz.min(axis=0))
+                hi = np.maximum(hi, xyz.max(axis=0))
+            to_records(xyz, rgb).tofile(f)
+            count += len(xyz)
+            colors = rgb is not None
+    if not count:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise ValueError(f"{source} has no points")
+    size = float((hi - lo).max()) or 1.0
+    builder = OctreeBuilder(partial, lo, size, node_points, bucket_points, progress)
+    nodes = builder.build(_file_chunks(staged), count)
+    os.remove(staged)
+    metadata = {
+        "version": FORMAT_VERSION,
+        "source": os.path.abspath(source),
+        "points": count,
+        "colors": colors,
+        "origin": lo.tolist(),
+        "size": size,
+        "nodes": nodes,
+    }
+    with open(os.path.join(partial, METADATA), "w") as f:
+        json.dump(metadata, f)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(partial, directory)
+    return Octree(directory)
+
+
+def is_point_cloud(path):
+    return path.lower().endswith(".pcd")
+
+
+def octree_key(path):
+    # Scans are too large to hash on every open: path, size and mtime identify them
+    stat = os.stat(path)
+    text = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{FORMAT_VERSION}|{NODE_POINTS}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cached_octree(progress, path, directory=None):
+    """GeometryJobExecutor job: the octree of a point cloud file, built on the first open."""
+    directory = directory or os.environ.get("CAD_OCTREE_CACHE", DEFAULT_DIRECTORY)
+    target = os.path.join(directory, octree_key(path))
+    if os.path.exists(os.path.join(target, METADATA)):
+        try:
+            return Octree(target)
+        except (ValueError, KeyError, OSError):
+            pass
+    os.makedirs(directory, exist_ok=True)
+    return build_octree(progress, path, target)
+
+
+def load_node(progress, octree, name):
+    """GeometryJobExecutor job: (name, Graphic3d_ArrayOfPoints) of one node, read from disk."""
+    records = octree.read(name)
+    progress.check()
+    return name, point_array(records["xyz"], records["rgb"] if octree.colors else None)
+
+
+class OctreeCloudView(QObject):
+    """Camera-driven display of an Octree in a qtViewer3d.
+
+    The root node is shown at once. After the camera settles, nodes are
+    picked coarse to fine by projected size, skipping those outside the
+    view, until the point budget is spent; missing nodes are read and
+    turned into point arrays on the job executor and displayed as they
+    arrive, and nodes no longer wanted are removed. Each node is its own
+    AIS_PointCloud; as nodes hold disjoint points, parents stay displayed
+    under their children.
+    """
+
+    def __init__(self, display, canvas, jobs, octree, budget=POINT_BUDGET, parent=None):
+        super().__init__(parent)
+        self.display = display
+        self.canvas = canvas
+        self.jobs = jobs
+        self.octree = octree
+        self.budget = budget
+        self._shown = {}
+        self._loading = {}
+        self._wanted = set()
+        self._queue = []
+        # Nodes whose read failed: never requested again for this view
+        self._broken = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(120)
+        self._timer.timeout.connect(self._on_timer)
+        # Nodes arriving close together share one redraw
+        self._redraw = QTimer(self)
+        self._redraw.setSingleShot(True)
+        self._redraw.setInterval(30)
+        self._redraw.timeout.connect(self.display.Context.UpdateCurrentViewer)
+        jobs.finished.connect(self._on_node_ready)
+        jobs.failed.connect(self._on_node_failed)
+        jobs.cancelled.connect(self._on_node_cancelled)
+        canvas.installEventFilter(self)
+
+    @property
+    def shown_points(self):
+        return sum(self.octree.count(name) for name in self._shown)
+
+    def show(self, fit=True):
+        _, points = load_node(NullProgress(), self.octree, "r")
+        self._display("r", points)
+        self._wanted = {"r"}
+        if fit:
+            self.display.FitAll()
+        self.display.Context.UpdateCurrentViewer()
+        self.schedule_update()
+
+    def clear(self):
+        self._timer.stop()
+        self._redraw.stop()
+        for job_id in list(self._loading):
+            self.jobs.cancel(job_id)
+        self._loading.clear()
+        self._queue.clear()
+        self._wanted.clear()
+        for ais in self._shown.values():
+            self.display.Context.Remove(ais, False)
+        self._shown.clear()
+        self.display.Context.UpdateCurrentViewer()
+
+    def schedule_update(self):
+        self._timer.start()
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Wheel, QEvent.MouseButtonRelease, QEvent.Resize, QEvent.KeyRelease):
+            self.schedule_update()
+        elif event.type() == QEvent.MouseMove and event.buttons():
+            # Refine once the camera stops, not while it moves
+            self.schedule_update()
+        return False
+
+    def _on_timer(self):
+        with operation("cloud update"):
+            self.update()
+
+    def node_size(self, camera, name):
+        """Projected size of a node's cube in pixels, 0 when it is outside the view."""
+        origin, size = self.octree.cube(name)
+        center = gp_Pnt(*(origin + size / 2))
+        radius = size * math.sqrt(3) / 2
+        direction = camera.Direction()
+        eye = camera.Eye()
+        depth = (
+            (center.X() - eye.X()) * direction.X()
+            + (center.Y() - eye.Y()) * direction.Y()
+            + (center.Z() - eye.Z()) * direction.Z()
+        )
+        if not camera.IsOrthographic() and depth < -radius:
+            return 0.0
+        dimensions = camera.ViewDimensions(max(depth, radius))
+        if dimensions.X() <= 0 or dimensions.Y() <= 0:
+            return float("inf")
+        # Bounding sphere against the view rectangle, in normalized device coordinates
+        ndc = camera.Project(center)
+        if abs(ndc.X()) > 1 + 2 * radius / dimensions.X() or abs(ndc.Y()) > 1 + 2 * radius / dimensions.Y():
+            return 0.0
+        return 2 * radius / dimensions.Y() * self.canvas.height()
+
+    def select(self):
+        """Nodes to show for the current camera, coarse to fine, within the point budget."""
+        camera = self.display.View.Camera()
+        wanted, total = [], 0
+        heap = [(-math.inf, "r")]
+        while heap:
+            _, name = heapq.heappop(heap)
+            count = self.octree.count(name)
+            if wanted and total + count > self.budget:
+                break
+            wanted.append(name)
+            total += count
+            for child in self.octree.children(name):
+                if child in self._broken:
+                    continue
+                size = self.node_size(camera, child)
+                if size >= MIN_NODE_PIXELS:
+                    heapq.heappush(heap, (-size, child))
+        return wanted
+
+    def update(self):
+        wanted = self.select()
+        self._wanted = set(wanted)
+        removed = [name for name in self._shown if name not in self._wanted]
+        for name in removed:
+            self.display.Context.Remove(self._shown.pop(name), False)
+        # The queue is replaced first: a cancel can call back into _submit
+        self._queue = [name for name in wanted if name not in self._shown]
+        for job_id, name in list(self._loading.items()):
+            if name not in self._wanted:
+                self.jobs.cancel(job_id)
+        self._submit()
+        if removed:
+            self._redraw.start()
+
+    def _submit(self):
+        while self._queue and len(self._loading) < MAX_LOADS:
+            name = self._queue.pop(0)
+            if name not in self._wanted or name in self._loading.values():
+                continue
+            self._loading[self.jobs.submit(load_node, self.octree, name)] = name
+
+    def _display(self, name, points):
+        ais = AIS_PointCloud()
+        ais.SetPoints(points)
+        self.display.Context.Display(ais, False)
+        self._shown[name] = ais
+
+    def _on_node_ready(self, job_id, result):
+        name = self._loading.pop(job_id, None)
+        if name is None:
+            return
+        if name in self._wanted and name not in self._shown:
+            with operation("cloud node"):
+                self._display(name, result[1])
+            self._redraw.start()
+        self._submit()
+
+    def _on_node_failed(self, job_id, message):
+        name = self._loading.pop(job_id, None)
+        if name is None:
+            return
+        self._broken.add(name)
+        self._wanted.discard(name)
+        log.warning("could not load point cloud node %s of %s: %s", name, self.octree.directory, message)
+        self._submit()
+
+    def _on_node_cancelled(self, job_id):
+        name = self._loading.pop(job_id, None)
+        if name is None:
+            return
+        if name in self._wanted and name not in self._shown and name not in self._queue:
+            # Cancelled by an earlier update, then wanted again
+            self._queue.insert(0, name)
+        self._submit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the out-of-core octree of a point cloud.")
+    parser.add_argument("cloud", help="PCD file")
+    parser.add_argument("output", help="octree directory")
+    parser.add_argument("--node-points", type=int, default=NODE_POINTS)
+    parser.add_argument("--bucket-points", type=int, default=BUCKET_POINTS, help="largest node set split in memory")
+    args = parser.parse_args(argv)
+
+    with open(args.cloud, "rb") as f:
+        if slow_lzf(read_pcd_header(f)):
+            print("lzf module not installed: decompressing with the pure Python decoder", file=sys.stderr)
+    start = time.perf_counter()
+    octree = build_octree(NullProgress(), args.cloud, args.output, args.node_points, args.bucket_points)
+    print(
+        f"{octree.points} points in {len(octree.nodes)} nodes, depth {octree.depth()}, "
+        f"built in {time.perf_counter() - start:.1f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
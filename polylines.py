@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+import numpy as np
+
+
+def chain(starts, ends):
+    """Join segments that share node ids into chains.
+
+    starts and ends hold the node id of each segment end. Returns a list of
+    (segments, flipped, closed): the segment indices in walk order, whether
+    each one is walked from its end to its start, and whether the chain
+    comes back to its first node. Zero-length segments are dropped. Open
+    chains are started from their loose ends so that they come out whole.
+    """
+    starts = np.asarray(starts).tolist()
+    ends = np.asarray(ends).tolist()
+    incident = defaultdict(list)
+    for seg, (a, b) in enumerate(zip(starts, ends)):
+        if a != b:
+            incident[a].append(seg)
+            incident[b].append(seg)
+    used = bytearray(len(starts))
+    chains = []
+    loose_ends = [node for node, segs in incident.items() if len(segs) != 2]
+    for node in loose_ends + list(incident):
+        for seg in incident[node]:
+            if not used[seg]:
+                chains.append(_walk(seg, node, starts, ends, incident, used))
+    return chains
+
+
+def _walk(seg, start_node, starts, ends, incident, used):
+    segments, flipped = [], []
+    node = start_node
+    while seg is not None:
+        used[seg] = 1
+        flip = starts[seg] != node
+        segments.append(seg)
+        flipped.append(flip)
+        node = starts[seg] if flip else ends[seg]
+        seg = next((s for s in incident[node] if not used[s]), None)
+    return np.array(segments), np.array(flipped), node == start_node
+
+
+def chain_polylines(starts, ends, node_points):
+    """Chains of segments as (points, closed), points an (n, 3) array of node positions.
+
+    A closed polyline does not repeat its first point.
+    """
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    polylines = []
+    for segments, flipped, closed in chain(starts, ends):
+        first = np.where(flipped, ends[segments], starts[segments])
+        if closed:
+            nodes = first
+        else:
+            last = ends[segments[-1]] if not flipped[-1] else starts[segments[-1]]
+            nodes = np.append(first, last)
+        polylines.append((node_points[nodes], closed))
+    return polylines
+
+
+def quantize(points, tolerance):
+    """Ids of points equal within tolerance, and one position per id."""
+    keys = np.round(np.asarray(points) / tolerance).astype(np.int64)
+    _, first, ids = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return ids.reshape(-1), np.asarray(points)[first]
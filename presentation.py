@@ -0,0 +1,150 @@
+from OCC.Core.AIS import AIS_Shape
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.SelectMgr import SelectMgr_IndexedMapOfOwner
+from OCC.Core.StdSelect import StdSelect_BRepOwner
+from OCC.Core.TopExp import topexp
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+
+from feature_tree import face_map
+from geometry_jobs import DEVIATION_ANGLE, display_deflection
+from tracing import span
+
+
+def changed_faces(old_shape, new_shape):
+    """Faces of new_shape that are not shared with old_shape."""
+    old_faces = face_map(old_shape)
+    new_faces = face_map(new_shape)
+    return [new_faces.FindKey(i) for i in range(1, new_faces.Size() + 1)
+            if not old_faces.Contains(new_faces.FindKey(i))]
+
+
+def is_triangulated(face):
+    return BRep_Tool.Triangulation(face, TopLoc_Location()) is not None
+
+
+class PresentationManager:
+    """Keeps one AIS_Shape per model object and updates it in place.
+
+    Updating an object swaps the shape of its existing AIS_Shape instead of
+    erasing and displaying a new one: faces shared with the previous shape
+    keep their Poly_Triangulation, only the changed faces are meshed, and
+    the camera and the selection of the surviving sub-shapes are preserved.
+    """
+
+    def __init__(self, display, style=None):
+        self.display = display
+        self.style = style
+        self._objects = {}
+        self.last_update = {}
+
+    def __contains__(self, key):
+        return key in self._objects
+
+    def get(self, key):
+        entry = self._objects.get(key)
+        return entry[0] if entry else None
+
+    def show(self, key, shape, history=None, update=True, fit=False, mesh=True):
+        """Display or update the object stored under key.
+
+        mesh=False is for shapes that already carry display triangulations
+        (e.g. from the tessellation cache): AIS is told not to mesh them.
+        """
+        with span("present", key=str(key)) as traced:
+            ais = self._show(key, shape, history, update, fit, mesh)
+            traced.set(**self.last_update)
+        return ais
+
+    def _show(self, key, shape, history, update, fit, mesh):
+        ctx = self.display.Context
+        entry = self._objects.get(key)
+        if entry is None:
+            if mesh:
+                self._mesh_if_needed(shape)
+            ais = AIS_Shape(shape)
+            if not mesh:
+                ais.Attributes().SetAutoTriangulation(False)
+            if self.style is not None:
+                self.style(ais)
+            ctx.Display(ais, False)
+            self._objects[key] = (ais, shape)
+            self.last_update = {"created": True, "changed": face_map(shape).Size(), "reused": 0}
+        else:
+            ais, old_shape = entry
+            changed = history.changed if history is not None else changed_faces(old_shape, shape)
+            if mesh:
+                self._mesh_if_needed(shape, changed)
+            selected, others = self._save_selection(old_shape)
+            if selected:
+                ctx.ClearSelected(False)
+            ais.SetShape(shape)
+            ctx.Redisplay(ais, False)
+            if selected:
+                self._restore_selection(ais, selected, others)
+            self._objects[key] = (ais, shape)
+            self.last_update = {
+                "created": False,
+                "changed": len(changed),
+                "reused": face_map(shape).Size() - len(changed),
+            }
+        if fit:
+            self.display.FitAll()
+        if update:
+            ctx.UpdateCurrentViewer()
+        return ais
+
+    def adopt(self, key, ais, shape):
+        """Register an AIS_Shape displayed elsewhere (batch or chunked display)."""
+        self._objects[key] = (ais, shape)
+
+    def remove(self, key, update=True):
+        entry = self._objects.pop(key, None)
+        if entry is not None:
+            self.display.Context.Remove(entry[0], update)
+
+    def clear(self, update=True):
+        for key in list(self._objects):
+            self.remove(key, update=False)
+        if update:
+            self.display.Context.UpdateCurrentViewer()
+
+    def _mesh_if_needed(self, shape, changed=None):
+        if changed is not None and all(is_triangulated(f) for f in changed):
+            return
+        # BRepMesh skips the faces that already carry a triangulation fine
+        # enough for this deflection, so unchanged faces are not re-meshed.
+        BRepMesh_IncrementalMesh(shape, display_deflection(shape), False, DEVIATION_ANGLE, True)
+
+    def _save_selection(self, old_shape):
+        ctx = self.display.Context
+        sub_shapes = TopTools_IndexedMapOfShape()
+        topexp.MapShapes(old_shape, sub_shapes)
+        selected, others = [], []
+        ctx.InitSelected()
+        while ctx.MoreSelected():
+            if ctx.HasSelectedShape() and sub_shapes.Contains(ctx.SelectedShape()):
+                selected.append(ctx.SelectedShape())
+            else:
+                others.append(ctx.SelectedOwner())
+            ctx.NextSelected()
+        return selected, others
+
+    def _restore_selection(self, ais, selected, others):
+        ctx = self.display.Context
+        for owner in others:
+            ctx.AddOrRemoveSelected(owner, False)
+        wanted = TopTools_IndexedMapOfShape()
+        for sub_shape in selected:
+            wanted.Add(sub_shape)
+        owners = SelectMgr_IndexedMapOfOwner()
+        for mode in {AIS_Shape.SelectionMode(s.ShapeType()) for s in selected}:
+            ctx.EntityOwners(owners, ais, mode)
+        for i in range(1, owners.Size() + 1):
+            owner = StdSelect_BRepOwner.DownCast(owners.FindKey(i))
+            if owner is None or not owner.HasShape():
+                continue
+            # Sub-shapes removed by the update simply drop out of the selection
+            if wanted.Contains(owner.Shape()):
+                ctx.AddOrRemoveSelected(owner, False)
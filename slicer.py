@@ -0,0 +1,183 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from OCC.Core.Bnd import Bnd_Box
+from OCC.Core.BRepAdaptor import BRepAdaptor_Curve
+from OCC.Core.BRepAlgoAPI import BRepAlgoAPI_Section
+from OCC.Core.BRepBndLib import brepbndlib
+from OCC.Core.GCPnts import GCPnts_QuasiUniformDeflection
+from OCC.Core.TopAbs import TopAbs_EDGE
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopoDS import topods
+from OCC.Core.gp import gp_Dir, gp_Pln, gp_Pnt
+
+from model_io import load_shape
+from polylines import chain, quantize
+
+# Shape being sliced in a worker process, loaded once by the pool initializer
+_worker_shape = None
+
+
+def load_source(source):
+    return load_shape(source) if isinstance(source, str) else source
+
+
+def _init_worker(source):
+    global _worker_shape
+    _worker_shape = load_source(source)
+
+
+def z_range(shape):
+    bbox = Bnd_Box()
+    brepbndlib.Add(shape, bbox)
+    _, _, zmin, _, _, zmax = bbox.Get()
+    return zmin, zmax
+
+
+def slice_heights(zmin, zmax, count):
+    """count heights in the middle of equal layers, never on the bottom or top face."""
+    step = (zmax - zmin) / count
+    return [zmin + (i + 0.5) * step for i in range(count)]
+
+
+def section_at(shape, z):
+    section = BRepAlgoAPI_Section(shape, gp_Pln(gp_Pnt(0.0, 0.0, z), gp_Dir(0.0, 0.0, 1.0)), False)
+    section.Build()
+    if not section.IsDone():
+        return None
+    return section.Shape()
+
+
+def section_polylines(section, deflection, tolerance):
+    """Edges of a section discretized and chained, as (points, closed) with (n, 3) points.
+
+    Edge ends closer than tolerance are joined; a closed polyline does not
+    repeat its first point.
+    """
+    pieces = []
+    explorer = TopExp_Explorer(section, TopAbs_EDGE)
+    while explorer.More():
+        curve = BRepAdaptor_Curve(topods.Edge(explorer.Current()))
+        explorer.Next()
+        sampler = GCPnts_QuasiUniformDeflection(curve, deflection)
+        if sampler.IsDone() and sampler.NbPoints() >= 2:
+            pieces.append(np.array([sampler.Value(i).Coord() for i in range(1, sampler.NbPoints() + 1)]))
+    if not pieces:
+        return []
+    # Chain the edges by their quantized end points, then expand each edge
+    ends = np.array([[p[0], p[-1]] for p in pieces])
+    ids, _ = quantize(ends.reshape(-1, 3), tolerance)
+    ids = ids.reshape(-1, 2)
+    polylines = []
+    for segments, flipped, closed in chain(ids[:, 0], ids[:, 1]):
+        parts = [pieces[s][::-1] if f else pieces[s] for s, f in zip(segments, flipped)]
+        points = np.concatenate([parts[0]] + [p[1:] for p in parts[1:]])
+        polylines.append((points[:-1] if closed else points, closed))
+    return polylines
+
+
+def _slice(task):
+    index, z, process = task
+    start = time.perf_counter()
+    result = section_at(_worker_shape, z)
+    if process is not None and result is not None:
+        result = process(result, z)
+    return index, z, result, time.perf_counter() - start
+
+
+def iter_slices(source, heights, processes=None, process=None):
+    """Yield (index, z, section, seconds) in completion order.
+
+    source is a model path, read once by each worker, or a shape, pickled
+    once per worker instead of once per task. Heights are handed out one
+    at a time: a worker that finishes a cheap layer immediately takes the
+    next one, so uneven layers do not leave cores idle, and each section
+    is yielded as soon as it is done. process(section, z), a module-level
+    function, runs in the worker and its result replaces the section.
+    """
+    processes = processes or os.cpu_count() or 1
+    tasks = ((index, z, process) for index, z in enumerate(heights))
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(source,)) as pool:
+        yield from pool.imap_unordered(_slice, tasks, chunksize=1)
+
+
+def slice_shape(source, count, processes=None):
+    """Sections of count layers, ordered bottom to top."""
+    heights = slice_heights(*z_range(load_source(source)), count)
+    sections = [None] * count
+    for index, _, section, _ in iter_slices(source, heights, processes):
+        sections[index] = section
+    return sections
+
+
+def scaling_report(source, count, process_counts=None):
+    """Wall time of slicing count layers for each process count: [(processes, seconds, speedup)]."""
+    heights = slice_heights(*z_range(load_source(source)), count)
+    process_counts = process_counts or _default_process_counts()
+    rows = []
+    for processes in process_counts:
+        start = time.perf_counter()
+        for _ in iter_slices(source, heights, processes):
+            pass
+        seconds = time.perf_counter() - start
+        rows.append((processes, seconds, rows[0][1] / seconds if rows else 1.0))
+    return rows
+
+
+def _default_process_counts():
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def show_progressively(source, count, processes=None):
+    from OCC.Display.SimpleGui import init_display
+    from PyQt5.QtWidgets import QApplication
+    shape = load_source(source)
+    display, start_display, _, _ = init_display()
+    display.DisplayShape(shape, transparency=0.8, update=True)
+    heights = slice_heights(*z_range(shape), count)
+    last_update = time.perf_counter()
+    for _, _, section, _ in iter_slices(source, heights, processes):
+        if section is not None:
+            display.DisplayShape(section, color="ORANGE", update=False)
+        if time.perf_counter() - last_update > 0.05:
+            display.Context.UpdateCurrentViewer()
+            QApplication.processEvents()
+            last_update = time.perf_counter()
+    display.Context.UpdateCurrentViewer()
+    start_display()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slice a model into horizontal sections on all cores.")
+    parser.add_argument("model", help="model file (BRep, STEP, IGES...)")
+    parser.add_argument("--slices", type=int, default=1000)
+    parser.add_argument("--processes", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--scaling", action="store_true", help="report the speedup for 1, 2, 4... processes")
+    parser.add_argument("--show", action="store_true", help="display the sections as they arrive")
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        print(f"{'processes':>9}{'seconds':>10}{'speedup':>9}{'efficiency':>12}")
+        for processes, seconds, speedup in scaling_report(args.model, args.slices):
+            print(f"{processes:>9}{seconds:>10.2f}{speedup:>9.2f}{speedup / processes:>12.0%}")
+    elif args.show:
+        show_progressively(args.model, args.slices, args.processes)
+    else:
+        start = time.perf_counter()
+        sections = slice_shape(args.model, args.slices, args.processes)
+        empty = sum(1 for s in sections if s is None)
+        print(f"{len(sections)} slices in {time.perf_counter() - start:.2f} s ({empty} failed)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from PyQt5.QtCore import QObject, QTimer
+
+from perf_stats import summarize
+
+DEFAULT_LOG = os.path.join(os.path.expanduser("~"), ".cache", "cad-python", "stalls.jsonl")
+DEFAULT_BUDGET_MS = 50.0
+# Heartbeat period of the GUI thread; a gap longer than this plus the budget is a stall
+HEARTBEAT_MS = 20
+# Stack samples kept per stall, one per budget while the GUI thread stays blocked
+MAX_SAMPLES = 8
+MAX_FRAMES = 40
+
+# Names of the operations running on the GUI thread, innermost last
+_operations = []
+
+
+@contextmanager
+def operation(name):
+    """Label GUI-thread work so that a stall inside it is logged under this name."""
+    _operations.append(name)
+    try:
+        yield
+    finally:
+        _operations.pop()
+
+
+def current_operation():
+    return "/".join(_operations) or None
+
+
+def format_stack(frame):
+    return [f"{f.filename}:{f.lineno} in {f.name}" for f in traceback.extract_stack(frame)[-MAX_FRAMES:]]
+
+
+class StallWatchdog(QObject):
+    """Detects event-loop stalls of the GUI thread and logs where they happened.
+
+    A QTimer beats every HEARTBEAT_MS on the GUI thread. A side thread
+    watches the last beat: once it is older than the budget the GUI thread
+    is stuck in a handler, and its Python stack is sampled through
+    sys._current_frames() while it stays stuck. When the loop resumes the
+    stall is written as one JSON line with its duration, the active
+    operation and the stack samples. Timer lateness is also kept as the
+    event-loop latency.
+    """
+
+    def __init__(self, budget_ms=DEFAULT_BUDGET_MS, log_path=DEFAULT_LOG, app="cad-python", parent=None):
+        super().__init__(parent)
+        self.budget = budget_ms / 1000.0
+        self.app = app
+        self.stalls = 0
+        self._period = HEARTBEAT_MS / 1000.0
+        self._gui_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._latencies = deque(maxlen=500)
+        self._stall = None
+        self._logger = self._make_logger(log_path)
+        self._stop = threading.Event()
+        self._timer = QTimer(self)
+        self._timer.setInterval(HEARTBEAT_MS)
+        self._timer.timeout.connect(self._beat)
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+
+    @staticmethod
+    def _make_logger(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        logger = logging.getLogger("cad.stalls")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        if not logger.handlers:
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=2 * 1024 ** 2, backupCount=3)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self._timer.start()
+        self._thread.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+
+    def latency(self):
+        """Event-loop latency: how late the heartbeat fired, as perf_stats.summarize."""
+        return summarize(self._latencies)
+
+    def _beat(self):
+        now = time.monotonic()
+        self._latencies.append(max(0.0, now - self._last_beat - self._period))
+        self._last_beat = now
+
+    def _watch(self):
+        poll = min(self.budget / 4.0, 0.01)
+        while not self._stop.wait(poll):
+            last = self._last_beat
+            now = time.monotonic()
+            if self._stall is None:
+                if now - last > self._period + self.budget:
+                    self._stall = {"since": last, "sampled": now, "operation": current_operation(), "samples": []}
+                    self._sample(now)
+            elif last != self._stall["since"]:
+                self._log(last)
+                self._stall = None
+            elif len(self._stall["samples"]) < MAX_SAMPLES and now - self._stall["sampled"] >= self.budget:
+                self._sample(now)
+
+    def _sample(self, now):
+        # A kernel call that holds the GIL keeps this thread waiting too: the
+        # sample is then taken as soon as it returns, still inside the handler.
+        frame = sys._current_frames().get(self._gui_thread)
+        if frame is None:
+            return
+        self._stall["sampled"] = now
+        self._stall["samples"].append({
+            "at_ms": round((now - self._stall["since"]) * 1000.0, 1),
+            "operation": current_operation(),
+            "stack": format_stack(frame),
+        })
+
+    def _log(self, resumed):
+        self.stalls += 1
+        stall = self._stall
+        self._logger.info(json.dumps({
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "app": self.app,
+            "pid": os.getpid(),
+            "blocked_ms": round((resumed - stall["since"] - self._period) * 1000.0, 1),
+            "budget_ms": self.budget * 1000.0,
+            "operation": stall["operation"],
+            "samples": stall["samples"],
+        }))
+
+
+def install(app, parent=None):
+    """Start a watchdog configured from the environment; None when disabled.
+
+    CAD_STALL_BUDGET_MS sets the budget (0 disables the watchdog) and
+    CAD_STALL_LOG the rotating log file.
+    """
+    budget_ms = float(os.environ.get("CAD_STALL_BUDGET_MS", DEFAULT_BUDGET_MS))
+    if budget_ms <= 0:
+        return None
+    watchdog = StallWatchdog(budget_ms, os.environ.get("CAD_STALL_LOG", DEFAULT_LOG), app, parent)
+    watchdog.start()
+    return watchdog
@@ -0,0 +1,102 @@
+import builtins
+import importlib.util
+import os
+import sys
+import time
+
+_T0 = time.perf_counter()
+
+
+def lazy_import(name):
+    """Module object whose code only runs on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class ImportProfile:
+    """Times first imports by wrapping builtins.__import__.
+
+    Each module is charged its own time only (self time), nested imports
+    are charged to themselves, like python -X importtime.
+    """
+
+    def __init__(self):
+        self.self_times = {}
+        self._stack = []
+        self._original = None
+
+    def install(self):
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            self.self_times[name] = self.self_times.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def top(self, n=15):
+        return sorted(self.self_times.items(), key=lambda kv: -kv[1])[:n]
+
+
+class StartupProfile:
+    """Named timestamps from process start-up to an interactive window."""
+
+    def __init__(self):
+        self.marks = []
+        self.imports = None
+        self.enabled = bool(os.environ.get("CAD_STARTUP_PROFILE"))
+        if self.enabled:
+            self.imports = ImportProfile()
+            self.imports.install()
+
+    def mark(self, name):
+        if name not in dict(self.marks):
+            self.marks.append((name, time.perf_counter() - _T0))
+
+    def elapsed(self, name):
+        return dict(self.marks).get(name)
+
+    def report(self):
+        lines = ["startup profile (ms since start):"]
+        previous = 0.0
+        for name, t in self.marks:
+            lines.append(f"  {t * 1000:8.1f}  (+{(t - previous) * 1000:7.1f})  {name}")
+            previous = t
+        if self.imports is not None:
+            lines.append("slowest imports (self ms):")
+            for name, seconds in self.imports.top():
+                lines.append(f"  {seconds * 1000:8.1f}  {name}")
+        return "\n".join(lines)
+
+    def finish(self):
+        if self.imports is not None:
+            self.imports.uninstall()
+        if self.enabled:
+            print(self.report())
+
+
+profile = StartupProfile()
@@ -0,0 +1,282 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from OCC.Core.MeshDS import MeshDS_DataSource
+from OCC.Core.MeshVS import MeshVS_Mesh, MeshVS_MeshPrsBuilder
+
+from mesh_arrays import STL_HEADER, STL_RECORD, MeshArrays, read_stl_records, vertex_normals, weld
+
+_VERTEX = re.compile(r"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+# Triangles per chunk when streaming a memory-mapped file: 50 MB of records
+CHUNK = 1 << 20
+
+
+class Stages:
+    """Wall time of consecutive named stages."""
+
+    def __init__(self):
+        self.times = []
+        self._last = time.perf_counter()
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.times.append((name, now - self._last))
+        self._last = now
+
+
+def is_binary_stl(path):
+    """Binary when the size matches the facet count of the header; "solid" alone proves nothing."""
+    size = os.path.getsize(path)
+    if size < STL_HEADER:
+        return False
+    with open(path, "rb") as f:
+        f.seek(STL_HEADER - 4)
+        count = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+    return size == STL_HEADER + count * STL_RECORD.itemsize
+
+
+def read_ascii_corners(path):
+    """(m, 3, 3) float32 corners of an ascii STL, parsed with one regular expression pass."""
+    with open(path, errors="replace") as f:
+        text = f.read()
+    values = np.array(_VERTEX.findall(text), dtype=np.float32)
+    if len(values) % 3:
+        raise ValueError(f"{path}: {len(values)} vertices, not a whole number of triangles")
+    return values.reshape(-1, 3, 3)
+
+
+def read_corners(path):
+    """(m, 3, 3) float32 triangle corners of a binary or ascii STL."""
+    if is_binary_stl(path):
+        return read_stl_records(path)["corners"]
+    return read_ascii_corners(path)
+
+
+def open_stl(path):
+    """Facets of a binary STL as a read-only memory-mapped structured array.
+
+    Nothing is read until a slice of it is used, and pages that were read
+    can be dropped again by the OS, so files larger than RAM can be walked
+    chunk by chunk with iter_chunks.
+    """
+    if not is_binary_stl(path):
+        raise ValueError(f"{path} is not a binary STL")
+    count = (os.path.getsize(path) - STL_HEADER) // STL_RECORD.itemsize
+    if count == 0:
+        return np.empty(0, dtype=STL_RECORD)
+    return np.memmap(path, dtype=STL_RECORD, mode="r", offset=STL_HEADER, shape=(count,))
+
+
+def iter_chunks(records, chunk=CHUNK):
+    """Yield (start, records) views of at most chunk facets."""
+    for start in range(0, len(records), chunk):
+        yield start, records[start:start + chunk]
+
+
+def stl_bounds(records, chunk=CHUNK):
+    """(min, max) corners of the facets, one chunk in memory at a time."""
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for _, part in iter_chunks(records, chunk):
+        points = part["corners"].reshape(-1, 3)
+        lo = np.minimum(lo, points.min(axis=0))
+        hi = np.maximum(hi, points.max(axis=0))
+    return lo, hi
+
+
+def stl_area(records, chunk=CHUNK):
+    area = 0.0
+    for _, part in iter_chunks(records, chunk):
+        corners = part["corners"].astype(np.float64)
+        cross = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        area += 0.5 * float(np.linalg.norm(cross, axis=1).sum())
+    return area
+
+
+def _merge_cells(keys, sums, counts):
+    keys, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    merged = np.column_stack([np.bincount(inverse, sums[:, i], len(keys)) for i in range(3)])
+    return keys, merged, np.bincount(inverse, counts, len(keys))
+
+
+def decimate_stl(records, cell, chunk=CHUNK):
+    """Vertex-clustering decimation of a memory-mapped STL into MeshArrays.
+
+    Corners falling in the same cubic cell of size cell become one vertex,
+    at their mean position, and triangles whose corners do not span three
+    cells disappear. Triangles over the same three cells are merged
+    whatever their corner order, keeping the winding of the first one.
+    Only one chunk of facets plus the occupied cells and the surviving
+    triangles are held in memory, so the output resolution, not the file
+    size, bounds the memory used.
+    """
+    lo, hi = stl_bounds(records, chunk)
+    shape = np.maximum(np.ceil((hi - lo) / cell).astype(np.int64), 1)
+    cell_keys, cell_sums, cell_counts = np.empty(0, dtype=np.int64), np.empty((0, 3)), np.empty(0)
+    # Surviving triangles as sorted cell keys, and whether the first one
+    # seen winds the other way round than that sorted order
+    tri_keys, tri_flipped = np.empty((0, 3), dtype=np.int64), np.empty(0, dtype=bool)
+    for _, part in iter_chunks(records, chunk):
+        points = part["corners"].reshape(-1, 3).astype(np.float64)
+        ijk = np.minimum(((points - lo) / cell).astype(np.int64), shape - 1)
+        keys = (ijk[:, 0] * shape[1] + ijk[:, 1]) * shape[2] + ijk[:, 2]
+        cell_keys, cell_sums, cell_counts = _merge_cells(
+            np.concatenate([cell_keys, keys]), np.concatenate([cell_sums, points]),
+            np.concatenate([cell_counts, np.ones(len(keys))]),
+        )
+        tri = keys.reshape(-1, 3)
+        tri = tri[(tri[:, 0] != tri[:, 1]) & (tri[:, 1] != tri[:, 2]) & (tri[:, 2] != tri[:, 0])]
+        # Rotating the smallest key first keeps the winding: it matches the
+        # sorted order unless the other two keys come out descending
+        first = np.argmin(tri, axis=1)
+        rotated = np.take_along_axis(tri, (first[:, None] + np.arange(3)) % 3, axis=1)
+        tri_keys, index = np.unique(np.concatenate([tri_keys, np.sort(tri, axis=1)]), axis=0, return_index=True)
+        tri_flipped = np.concatenate([tri_flipped, rotated[:, 1] > rotated[:, 2]])[index]
+    tri = tri_keys.copy()
+    tri[tri_flipped, 1], tri[tri_flipped, 2] = tri_keys[tri_flipped, 2], tri_keys[tri_flipped, 1]
+    triangles = np.searchsorted(cell_keys, tri).astype(np.int32)
+    vertices = (cell_sums / cell_counts[:, None]).astype(np.float32)
+    return MeshArrays(vertices, None, triangles, np.full(len(triangles), -1, dtype=np.int32))
+
+
+def stream_stl(display, records, chunk=CHUNK):
+    """Display a memory-mapped STL chunk by chunk, redrawing after each one.
+
+    Each chunk is welded on its own and shown as a separate MeshVS
+    presentation, so the first triangles appear before the file is read.
+    """
+    from PyQt5.QtWidgets import QApplication
+    presentations = []
+    for _, part in iter_chunks(records, chunk):
+        vertices, triangles = weld(part["corners"])
+        mesh = MeshArrays(np.ascontiguousarray(vertices), None, triangles, np.full(len(triangles), -1, dtype=np.int32))
+        presentation = mesh_presentation(mesh_data_source(mesh))
+        display.Context.Display(presentation, False)
+        presentations.append(presentation)
+        if len(presentations) == 1:
+            display.FitAll()
+        display.Context.UpdateCurrentViewer()
+        QApplication.processEvents()
+    return presentations
+
+
+def load_stl(path, tolerance=None, normals=False, dtype=np.float32):
+    """Read an STL into an indexed MeshArrays, and a report of the weld and stage times.
+
+    STL repeats every vertex for each triangle around it. The corners are
+    welded with one np.unique (on their bits, or quantized to tolerance),
+    which gives the int32 triangles directly; triangles that collapse to a
+    line or a point are dropped.
+    """
+    stages = Stages()
+    corners = read_corners(path)
+    stages.mark("read")
+    vertices, triangles = weld(corners, tolerance=tolerance)
+    stages.mark("weld")
+    a, b, c = triangles.T
+    degenerate = (a == b) | (b == c) | (c == a)
+    if degenerate.any():
+        triangles = triangles[~degenerate]
+    triangles = np.ascontiguousarray(triangles)
+    vertices = np.ascontiguousarray(vertices, dtype=dtype)
+    stages.mark("index")
+    mesh = MeshArrays(vertices, None, triangles, np.full(len(triangles), -1, dtype=np.int32))
+    if normals:
+        mesh.normals = vertex_normals(vertices, triangles)
+        stages.mark("normals")
+    report = {
+        "triangles": len(corners),
+        "corners": len(corners) * 3,
+        "vertices": len(vertices),
+        "degenerate": int(degenerate.sum()),
+        "stages": stages.times,
+    }
+    return mesh, report
+
+
+def mesh_data_source(mesh):
+    """A MeshDS_DataSource over the welded arrays; both must be contiguous."""
+    return MeshDS_DataSource(mesh.vertices, mesh.triangles)
+
+
+def mesh_presentation(data_source):
+    mesh_vs = MeshVS_Mesh()
+    mesh_vs.SetDataSource(data_source)
+    mesh_vs.AddBuilder(MeshVS_MeshPrsBuilder(mesh_vs), True)
+    return mesh_vs
+
+
+def format_report(path, report):
+    corners, vertices = report["corners"], report["vertices"]
+    lines = [
+        f"{os.path.basename(path)}: {report['triangles']} triangles, "
+        f"{corners} corners welded to {vertices} vertices ({corners / max(vertices, 1):.1f} per vertex), "
+        f"{report['degenerate']} degenerate triangles dropped"
+    ]
+    for name, seconds in report["stages"]:
+        lines.append(f"  {name:<12}{seconds * 1000:9.1f} ms")
+    lines.append(f"  {'total':<12}{sum(s for _, s in report['stages']) * 1000:9.1f} ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load an STL as an indexed mesh and report the weld.")
+    parser.add_argument("model")
+    parser.add_argument("--tolerance", type=float, help="merge vertices closer than this (default: equal bits)")
+    parser.add_argument("--show", action="store_true", help="display the mesh with MeshVS")
+    parser.add_argument("--stats", action="store_true", help="bounding box and area of a memory-mapped binary STL")
+    parser.add_argument("--decimate", type=float, metavar="CELL", help="cluster vertices of a memory-mapped binary STL")
+    parser.add_argument("--stream", action="store_true", help="display a memory-mapped binary STL chunk by chunk")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="triangles per chunk")
+    args = parser.parse_args(argv)
+
+    if args.stats or args.decimate or args.stream:
+        return _main_mapped(args)
+    mesh, report = load_stl(args.model, args.tolerance)
+    start = time.perf_counter()
+    data_source = mesh_data_source(mesh)
+    report["stages"].append(("data source", time.perf_counter() - start))
+    print(format_report(args.model, report))
+    if args.show:
+        from OCC.Display.SimpleGui import init_display
+        display, start_display, _, _ = init_display()
+        display.Context.Display(mesh_presentation(data_source), True)
+        display.FitAll()
+        start_display()
+    return 0
+
+
+def _main_mapped(args):
+    records = open_stl(args.model)
+    print(f"{os.path.basename(args.model)}: {len(records)} triangles mapped")
+    if args.stats:
+        start = time.perf_counter()
+        lo, hi = stl_bounds(records, args.chunk)
+        area = stl_area(records, args.chunk)
+        print(f"bounds {lo} - {hi}, area {area:.6g} in {time.perf_counter() - start:.2f} s")
+    mesh = None
+    if args.decimate:
+        start = time.perf_counter()
+        mesh = decimate_stl(records, args.decimate, args.chunk)
+        print(f"decimated to {len(mesh)} triangles, {len(mesh.vertices)} vertices in {time.perf_counter() - start:.2f} s")
+    if args.stream or args.show:
+        from OCC.Display.SimpleGui import init_display
+        display, start_display, _, _ = init_display()
+        if mesh is not None and args.show:
+            display.Context.Display(mesh_presentation(mesh_data_source(mesh)), True)
+            display.FitAll()
+        else:
+            stream_stl(display, records, args.chunk)
+        start_display()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("OCC")
+
+from lod import pick_level
+
+THRESHOLDS = (120.0, 600.0)
+
+
+@pytest.mark.parametrize("size, current, expected", [
+    # Within the hysteresis band of the next boundary: stay
+    (130.0, 0, 0),
+    (550.0, 2, 2),
+    (110.0, 1, 1),
+    # Clearly past one boundary
+    (140.0, 0, 1),
+    (700.0, 1, 2),
+    (500.0, 2, 1),
+    (100.0, 1, 0),
+    # Several levels at once, the far boundary still inside its band
+    (650.0, 0, 1),
+    (110.0, 2, 1),
+    # Several levels at once, clearly past both boundaries
+    (700.0, 0, 2),
+    (100.0, 2, 0),
+])
+def test_pick_level(size, current, expected):
+    assert pick_level(size, current, THRESHOLDS) == expected
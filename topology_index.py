@@ -0,0 +1,70 @@
+from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_FACE, TopAbs_VERTEX
+from OCC.Core.TopExp import topexp
+from OCC.Core.TopoDS import topods
+from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+
+KINDS = {
+    TopAbs_FACE: ("face", topods.Face),
+    TopAbs_EDGE: ("edge", topods.Edge),
+    TopAbs_VERTEX: ("vertex", topods.Vertex),
+}
+
+
+class TopologyIndex:
+    """Integer IDs for the faces, edges and vertices of one shape.
+
+    Built once per shape with one TopTools_IndexedMapOfShape per kind.
+    Both directions are constant time: FindIndex hashes the TShape and
+    location, FindKey is an array access. IDs are 0-based map positions,
+    the same numbering as feature_tree.face_index, so they are stable for
+    a given shape and can key caches, property panels or history.
+    """
+
+    def __init__(self, shape):
+        self.shape = shape
+        self._maps = {}
+        for topabs in KINDS:
+            sub_shapes = TopTools_IndexedMapOfShape()
+            topexp.MapShapes(shape, topabs, sub_shapes)
+            self._maps[topabs] = sub_shapes
+
+    def count(self, topabs=TopAbs_FACE):
+        return self._maps[topabs].Size()
+
+    def id_of(self, sub_shape):
+        """(kind, id) of a sub-shape, or None if it is not a face/edge/vertex of the shape."""
+        topabs = sub_shape.ShapeType()
+        if topabs not in self._maps:
+            return None
+        index = self._maps[topabs].FindIndex(sub_shape)
+        if index == 0:
+            return None
+        return KINDS[topabs][0], index - 1
+
+    def ids(self, sub_shapes):
+        found = (self.id_of(s) for s in sub_shapes)
+        return [i for i in found if i is not None]
+
+    def face_id(self, face):
+        return self._maps[TopAbs_FACE].FindIndex(face) - 1
+
+    def edge_id(self, edge):
+        return self._maps[TopAbs_EDGE].FindIndex(edge) - 1
+
+    def vertex_id(self, vertex):
+        return self._maps[TopAbs_VERTEX].FindIndex(vertex) - 1
+
+    def face(self, face_id):
+        return self._get(TopAbs_FACE, face_id)
+
+    def edge(self, edge_id):
+        return self._get(TopAbs_EDGE, edge_id)
+
+    def vertex(self, vertex_id):
+        return self._get(TopAbs_VERTEX, vertex_id)
+
+    def _get(self, topabs, sub_id):
+        sub_shapes = self._maps[topabs]
+        if not 0 <= sub_id < sub_shapes.Size():
+            raise IndexError(f"{KINDS[topabs][0]} {sub_id} does not exist on the shape")
+        return KINDS[topabs][1](sub_shapes.FindKey(sub_id + 1))
@@ -0,0 +1,200 @@
+import atexit
+import functools
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+
+ENABLED = bool(os.environ.get("CAD_TRACE"))
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class Tracer:
+    """Collects complete ("X") events from any thread."""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._threads = {}
+
+    def add(self, name, start, end, args):
+        ident = threading.get_ident()
+        with self._lock:
+            if ident not in self._threads:
+                self._threads[ident] = (len(self._threads) + 1, threading.current_thread().name)
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._t0) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": self._threads[ident][0],
+                "args": args,
+            })
+
+    def to_json(self):
+        with self._lock:
+            events = list(self.events)
+            threads = list(self._threads.values())
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+            for tid, name in threads
+        ]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f)
+        return path
+
+
+tracer = Tracer()
+
+
+def span(name, **args):
+    """Context manager timing a block; free when tracing is off."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(tracer, name, args)
+
+
+def shape_size(shapes):
+    """Faces and edges of a shape or a sequence of shapes."""
+    from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_FACE
+    from OCC.Core.TopExp import topexp
+    from OCC.Core.TopTools import TopTools_IndexedMapOfShape
+    from OCC.Core.TopoDS import TopoDS_Shape
+    if isinstance(shapes, TopoDS_Shape):
+        shapes = [shapes]
+    faces = TopTools_IndexedMapOfShape()
+    edges = TopTools_IndexedMapOfShape()
+    for shape in shapes:
+        if isinstance(shape, TopoDS_Shape) and not shape.IsNull():
+            topexp.MapShapes(shape, TopAbs_FACE, faces)
+            topexp.MapShapes(shape, TopAbs_EDGE, edges)
+    return {"faces": faces.Size(), "edges": edges.Size()}
+
+
+def _shape_args(args):
+    from OCC.Core.TopoDS import TopoDS_Shape
+    shapes = []
+    for arg in args:
+        if isinstance(arg, TopoDS_Shape):
+            shapes.append(arg)
+        elif isinstance(arg, (list, tuple)):
+            shapes.extend(a for a in arg if isinstance(a, TopoDS_Shape))
+    return shapes
+
+
+def _wrap(cls, method, name):
+    original = getattr(cls, method)
+    if getattr(original, "_traced", False):
+        return
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        # args[0] is self: a half-constructed SWIG proxy in __init__
+        shapes = _shape_args(args[1:])
+        with _Span(tracer, name, shape_size(shapes) if shapes else {}):
+            return original(*args, **kwargs)
+
+    wrapper._traced = True
+    setattr(cls, method, wrapper)
+
+
+# module, class, methods to wrap
+TARGETS = (
+    ("OCC.Core.BRepAlgoAPI", "BRepAlgoAPI_Cut", ("__init__", "Build")),
+    ("OCC.Core.BRepAlgoAPI", "BRepAlgoAPI_Fuse", ("__init__", "Build")),
+    ("OCC.Core.BRepAlgoAPI", "BRepAlgoAPI_Section", ("__init__", "Build")),
+    ("OCC.Core.BRepMesh", "BRepMesh_IncrementalMesh", ("__init__", "Perform")),
+    ("OCC.Core.STEPControl", "STEPControl_Reader", ("TransferRoot", "TransferRoots")),
+    ("OCC.Core.HLRBRep", "HLRBRep_Algo", ("Update",)),
+    ("OCC.Core.BRepPrimAPI", "BRepPrimAPI_MakePrism", ("__init__",)),
+    ("OCC.Core.BRepFeat", "BRepFeat_MakePrism", ("Perform",)),
+    ("OCC.Display.OCCViewer", "Viewer3d", ("DisplayShape",)),
+)
+
+_installed = False
+
+
+def install(output=None):
+    """Wrap the kernel entry points in TARGETS and export the trace at exit.
+
+    Every call then becomes a span carrying the face and edge counts of
+    its input shapes. The trace goes to output, else to CAD_TRACE (1 means
+    trace-<pid>.json), and opens in chrome://tracing or ui.perfetto.dev.
+    """
+    global ENABLED, _installed
+    ENABLED = True
+    if _installed:
+        return
+    _installed = True
+    import importlib
+    for module_name, class_name, methods in TARGETS:
+        try:
+            cls = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError):
+            continue
+        for method in methods:
+            if hasattr(cls, method):
+                _wrap(cls, method, f"{class_name}.{method.strip('_')}")
+    output = output or os.environ.get("CAD_TRACE")
+    if not output or output == "1":
+        output = f"trace-{os.getpid()}.json"
+    atexit.register(lambda: print(f"trace written to {tracer.export(output)}", file=sys.stderr))
+
+
+def main(argv=None):
+    """Run a script, e.g. one of reference/examples, with tracing installed."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv:
+        print("usage: python tracing.py script.py [args...]", file=sys.stderr)
+        return 2
+    install()
+    sys.argv = argv
+    runpy.run_path(argv[0], run_name="__main__")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run through the importable module so that the script and our own
+    # modules share one tracer
+    import tracing
+    sys.exit(tracing.main())